@@ -1,61 +1,78 @@
 # app.py
 from __future__ import annotations
-import os, time, mimetypes, secrets, json
+import os
+
+# Cooperative I/O: patch the stdlib before flask/requests/pymongo/openai import
+# sockets, so outbound LLM / job-board / Mongo calls yield instead of blocking
+# the worker. ASYNC_MODE must come from the process env (.env loads later).
+ASYNC_MODE = os.getenv("ASYNC_MODE", "gevent")
+if ASYNC_MODE == "gevent":
+    from gevent import monkey
+    monkey.patch_all()
+
+import time, mimetypes, secrets, json, re, hashlib, queue
+import orjson
+import numpy as np
 from pathlib import Path
 from typing import Dict, Any
 
 from dotenv import load_dotenv
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, Response, request, jsonify, render_template, stream_with_context
 from flask_cors import CORS, cross_origin
 from flask_socketio import SocketIO, emit, join_room
 from flask_talisman import Talisman
 from werkzeug.utils import secure_filename
 
-from cryptography.fernet import Fernet
-from flask_jwt_extended import (
-    JWTManager, jwt_required, verify_jwt_in_request, get_jwt
-)
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
+from flask_jwt_extended import JWTManager
 
 # --- Load env BEFORE importing config (so config sees env) ---
 ENV_PATH = Path(__file__).with_name(".env")
 load_dotenv(ENV_PATH)
 
 # --- Local modules ---
-from helpers import _now, _ema
+from helpers import _now, _ema, _ema_fold, run_native
 from config import DevConfig, ProdConfig, validate_required_secrets
 
 from interviewer import generate_questions, score_answer
 from interview_insights import generate_insights
-from metrics import _ensure_face_state, _finalize_face_summary, _reset_per_question_face_state
+from metrics import _new_face_state, _finalize_face_summary, _reset_per_question_face_state
 
-from storage import DB, new_id
-from parsers import parse_resume_bytes
+from storage import (
+    DB, new_id, get_resume as load_resume, get_resume_bytes, put_resume, drop_resume, get_session, put_session,
+    session_lock, get_face, put_face,
+    find_upload, remember_upload, forget_upload,
+)
+from json_provider import OrjsonProvider, dumps_bytes
+from jobs import submit as submit_job, get_job, job_key
+import llm_cache
+import cache
+from crypto import make_fernet, make_blob_cipher, log_backend_info
+from parsers import parse_resume_stream, parse_resume_text, forget_parsed
 from reviewer import reviewer
 from matcher import rank_jobs
 from footprint import scan as footprint_scan
 from llm_client import (
     analyze_resume_with_llm,
     analyze_resume_review_llm,
+    analyze_resume_bundle,
     refine_resume_for_job_llm,
     generate_cover_letter_llm,
 )
 
 # Auth blueprint (Mongo store lives in auth_store.py)
-from auth import auth_bp, init_auth
+from auth import auth_bp, init_auth, limiter, jwt_required_cached, current_claims
 from auth_store import save_resume  # <- persist resume metadata to Mongo
 
 # ------------------------------
 # App / Config
 # ------------------------------
 app = Flask(__name__)
+app.json = OrjsonProvider(app)  # orjson for jsonify / request.get_json
 app.config.from_object(ProdConfig if os.getenv("ENV") == "prod" else DevConfig)
 validate_required_secrets()  # raises only when ENV=prod and secrets missing
 
-# JWT + Limiter (limiter for non-auth routes; auth routes init inside init_auth)
+# JWT (the shared rate limiter lives in auth.py and is bound in init_auth)
 jwt = JWTManager(app)
-limiter = Limiter(key_func=get_remote_address, app=app, default_limits=["200 per hour"])
 
 from flask_cors import CORS
 cors_origins = os.getenv("CORS_ORIGINS", "*")
@@ -66,6 +83,7 @@ CORS(
     supports_credentials=False,
     allow_headers=["Authorization", "Content-Type"],
     methods=["GET", "POST", "DELETE", "OPTIONS", "PUT", "PATCH"],
+    max_age=600,  # let browsers cache preflights
 )
 
 # Security headers / CSP
@@ -119,9 +137,12 @@ else:
 app.register_blueprint(auth_bp, url_prefix="/auth")
 init_auth(app)
 
-# Fernet encryption
+# Fernet encryption (Rust backend when available, see crypto.py)
 FERNET_KEY = os.getenv("FERNET_KEY")
-fernet = Fernet(FERNET_KEY.encode()) if FERNET_KEY else None
+fernet = make_fernet(FERNET_KEY)
+# Uploaded files: chunked AES-GCM streamed to disk (legacy Fernet blobs still decrypt)
+blob_cipher = make_blob_cipher(FERNET_KEY)
+log_backend_info()
 
 # Upload settings
 ALLOWED_EXTS = {"pdf", "txt", "doc", "docx"}
@@ -134,55 +155,18 @@ def allowed_file(filename: str) -> bool:
 
 app.url_map.strict_slashes = False  # avoid /login -> /login/ redirects
 
-IS_PROD = (os.getenv("ENV") == "prod") and not app.config.get("DEBUG", False)
-
-# If you used Talisman, only force HTTPS in prod:
-if IS_PROD:
-    Talisman(app, force_https=True, content_security_policy={...})
-else:
-    Talisman(
-        app,
-        force_https=False,                 # <- important: no HTTPS redirect in dev
-        content_security_policy={
-            "default-src": ["'self'"],
-            "img-src": ["'self'","data:"],
-            "style-src": ["'self'","'unsafe-inline'"],
-            "script-src": ["'self'"],
-            "connect-src": ["'self'", "http://localhost:8000", "ws://localhost:8000"],
-            "media-src": ["'self'","blob:"],
-            "frame-ancestors": ["'none'"],
-        },
-        session_cookie_secure=False,
-        session_cookie_samesite="Lax",
-    )
-
 # also make sure your .env has ENV=dev while developing
 
 
 
 
-socketio = SocketIO(app, cors_allowed_origins="*")
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode=ASYNC_MODE)
 ALLOWED_ORIGINS = [
     "http://localhost:3000", "http://127.0.0.1:3000",
     "http://localhost:5173", "http://127.0.0.1:5173",
     "http://localhost:8000", "http://127.0.0.1:8000",
 ]
 
-@app.before_request
-def _cors_preflight_shortcircuit():
-    if request.method == "OPTIONS":
-        origin = request.headers.get("Origin", "")
-        resp = app.make_response(("", 204))
-        if origin:
-            resp.headers["Access-Control-Allow-Origin"] = origin
-            resp.headers["Vary"] = "Origin"
-        acrh = request.headers.get("Access-Control-Request-Headers", "Authorization, Content-Type")
-        acrm = request.headers.get("Access-Control-Request-Method", "GET,POST,PUT,PATCH,DELETE,OPTIONS")
-        resp.headers["Access-Control-Allow-Headers"] = acrh
-        resp.headers["Access-Control-Allow-Methods"] = acrm
-        resp.headers["Access-Control-Max-Age"] = "600"
-        return resp
-
 @socketio.on("connect")
 def sio_connect(auth):
     """Dev: allow all Socket.IO connections without JWT for now."""
@@ -203,7 +187,7 @@ def home():
 # ------------------------------
 @limiter.limit("30/minute")
 @app.route("/upload", methods=["POST"])
-@jwt_required()
+@jwt_required_cached()
 def upload():
     # Require encryption configured
     if not fernet:
@@ -221,33 +205,33 @@ def upload():
     if not any(x in mime for x in ["pdf", "text", "officedocument", "msword"]):
         return jsonify({"error": "mime not allowed"}), 400
 
-    raw_bytes = f.read()
-    if not raw_bytes:
+    # An identical re-upload by the same user reuses the stored resume (and its
+    # cached reviews) instead of encrypting, parsing and storing it again.
+    digest, size = run_native(_sha256_stream, f.stream)
+    if not size:
         return jsonify({"error": "empty file"}), 400
-
-    # Encrypt and persist only ciphertext
-    try:
-        cipher = fernet.encrypt(raw_bytes)
-    except Exception as e:
-        return jsonify({"error": f"encryption failed: {e}"}), 500
+    owner = _job_owner()
+    existing = find_upload(owner, digest)
+    if existing:
+        print(f"[upload] identical file already stored as resume_id={existing}")
+        return jsonify({"resume_id": existing})
 
     safe_name = secure_filename(f.filename)
     rid = secrets.token_hex(16)
     enc_path = f"./uploads/{rid}_{safe_name}.enc"
 
+    # Encrypt straight from the (spooled) upload stream; only ciphertext hits disk
     try:
-        with open(enc_path, "wb") as fh:
-            fh.write(cipher)
+        enc_size = run_native(_write_encrypted, f.stream, enc_path)
     except Exception as e:
-        return jsonify({"error": f"write failed: {e}"}), 500
+        if os.path.exists(enc_path):
+            os.remove(enc_path)
+        return jsonify({"error": f"encryption failed: {e}"}), 500
 
-    # Extract raw text from plaintext bytes (no further parsing here)
-    try:
-        parsed_for_text = parse_resume_bytes(raw_bytes)
-        raw_text = parsed_for_text.get("raw_text", "")
-        print(f"[upload] extracted raw_text length={len(raw_text)} for resume_id={rid}")
-    finally:
-        del raw_bytes  # minimize plaintext lifetime
+    # Extract raw text from the same spooled upload (not a second in-memory copy)
+    parsed_for_text = parse_resume_stream(f.stream, digest)
+    raw_text = parsed_for_text.get("raw_text", "")
+    print(f"[upload] extracted raw_text length={len(raw_text)} for resume_id={rid}")
 
     # Persist raw text JSON alongside encrypted blob
     json_path = f"./uploads/{rid}.json"
@@ -256,26 +240,30 @@ def upload():
         "raw_text": raw_text,
         "orig_name": safe_name,
         "mime": mime,
+        # Parsed once here so match endpoints never re-derive them
+        **_structured_fields(parsed_for_text),
     }
     try:
-        with open(json_path, "w", encoding="utf-8") as jf:
-            json.dump(payload, jf, ensure_ascii=False, indent=2)
+        with open(json_path, "wb") as jf:
+            jf.write(dumps_bytes(payload, orjson.OPT_INDENT_2))
     except Exception:
         # Non-fatal: continue even if JSON write fails
         pass
 
     # Cache minimal parsed in-memory for fast ops
-    DB.setdefault("resumes", {})[rid] = payload
-    DB.setdefault("files", {})[rid] = {
+    put_resume(rid, payload, file_meta={
         "enc_path": enc_path,
         "orig_name": safe_name,
         "mime": mime,
-        "size": len(cipher),
-    }
+        "size": enc_size,
+        "owner": owner,
+        "sha256": digest,
+    })
+    remember_upload(owner, digest, rid)
 
     # Persist metadata to Mongo (user-scoped)
     try:
-        claims = get_jwt()  # from @jwt_required()
+        claims = current_claims()
         email = claims.get("email") or claims.get("sub")
         if email:
             save_resume(user_email=email, enc_path=enc_path, mime=mime, meta=payload)
@@ -285,93 +273,301 @@ def upload():
 
     return jsonify({"resume_id": rid})
 
+# Fields of the structured parse kept with the stored resume
+STRUCTURED_FIELDS = ("skills", "roles", "region", "location")
+
+def _structured_fields(parsed: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: parsed[k] for k in STRUCTURED_FIELDS if k in parsed}
+
+def _ensure_structured(resume_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Backfill skills/roles/region for resumes stored before they were parsed at upload."""
+    if "skills" in payload or not payload.get("raw_text"):
+        return payload
+    payload = {**payload, **_structured_fields(parse_resume_text(payload["raw_text"]))}
+    put_resume(resume_id, payload)
+    return payload
+
+def _write_encrypted(stream, enc_path: str) -> int:
+    with open(enc_path, "wb") as fh:
+        blob_cipher.encrypt_stream(stream, fh)
+        return fh.tell()
+
+def _sha256_stream(stream, chunk_size: int = 64 * 1024):
+    """Hash an upload stream without holding it in memory; rewinds it afterwards."""
+    h, size = hashlib.sha256(), 0
+    while chunk := stream.read(chunk_size):
+        h.update(chunk)
+        size += len(chunk)
+    stream.seek(0)
+    return h.hexdigest(), size
+
 def load_encrypted_resume(enc_path: str) -> bytes:
+    """Decrypt the original upload (cold path: re-parse / export only).
+
+    Request handlers work from the stored payload (get_resume) and must not
+    call this; the .enc blob is at-rest storage of the original file.
+    """
     with open(enc_path, "rb") as fh:
-        return fernet.decrypt(fh.read())
+        return blob_cipher.decrypt(fh.read())
+
+# ------------------------------
+# Background LLM jobs (opt-in with "Prefer: respond-async")
+# ------------------------------
+def _wants_async() -> bool:
+    return "respond-async" in (request.headers.get("Prefer") or "").lower()
+
+def _job_owner() -> str:
+    claims = current_claims()
+    return claims.get("email") or claims.get("sub") or ""
+
+def _notify_job(job: Dict[str, Any]) -> None:
+    socketio.emit("job_ready", {"job_id": job["job_id"], "kind": job["kind"], "status": job["status"]}, to=job["job_id"])
+
+def _enqueue(kind: str, raw_text: str, fn, extra: Dict[str, Any] | None = None):
+    """Run `fn` off the request worker and answer 202 with a job to poll."""
+    owner = _job_owner()
+    job = submit_job(kind, job_key(kind, owner, raw_text, extra), owner, fn,
+                     socketio.start_background_task, _notify_job)
+    resp = jsonify({"job_id": job["job_id"], "kind": kind, "status": job["status"]})
+    resp.headers["Location"] = f"/jobs/{job['job_id']}"
+    return resp, 202
+
+# ------------------------------
+# Streaming LLM routes (opt-in with "Accept: text/event-stream")
+# ------------------------------
+def _wants_stream() -> bool:
+    return "text/event-stream" in (request.headers.get("Accept") or "").lower()
+
+def _sse(event: str, data) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+def _stream_llm(run):
+    """Answer with Server-Sent Events while `run(on_delta)` talks to the LLM.
+
+    Each model token goes out as a `delta` event as soon as it arrives, then
+    one `done` event carries the parsed result (or `error` its message).
+    """
+    events: "queue.Queue" = queue.Queue()
+
+    def work():
+        try:
+            events.put(("done", run(lambda piece: events.put(("delta", piece)))))
+        except Exception as e:
+            print(f"[stream] LLM call failed: {e}")
+            events.put(("error", {"error": str(e)}))
+
+    socketio.start_background_task(work)
+
+    def generate():
+        while True:
+            event, data = events.get()
+            yield _sse(event, data)
+            if event != "delta":
+                return
+
+    return Response(stream_with_context(generate()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/jobs/<job_id>")
+@jwt_required_cached()
+def job_status(job_id: str):
+    job = get_job(job_id)
+    if not job or job["owner"] != _job_owner():
+        return jsonify({"error": "Unknown job_id"}), 404
+    body = {"job_id": job_id, "kind": job["kind"], "status": job["status"]}
+    if job["status"] == "done":
+        body["result"] = job["result"]
+    elif job["status"] == "error":
+        body["error"] = job["error"]
+    return jsonify(body)
+
+@socketio.on("watch_job")
+def on_watch_job(data):
+    job_id = (data or {}).get("job_id")
+    job = get_job(job_id) if job_id else None
+    if not job:
+        emit("error", {"error": "unknown job"}); return
+    join_room(job_id)
+    if job["status"] in ("done", "error"):
+        emit("job_ready", {"job_id": job_id, "kind": job["kind"], "status": job["status"]}, to=job_id)
+
+# ------------------------------
+# Per-resume LLM results: Redis first, disk (./uploads/<id>_<kind>.json) for durability
+# ------------------------------
+RESULT_CACHE_TTL = int(os.getenv("RESULT_CACHE_TTL", str(24 * 3600)))
+
+def _result_key(resume_id: str, kind: str) -> str:
+    return f"resume:{resume_id}:{kind}"
+
+def _load_result(resume_id: str, kind: str):
+    """Cached result as serialized JSON bytes (Redis, then disk), sent without re-encoding."""
+    raw = cache.get_bytes(_result_key(resume_id, kind))
+    if raw is not None:
+        return raw
+    path = f"./uploads/{resume_id}_{kind}.json"
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as fh:
+            raw = fh.read()
+        orjson.loads(raw)  # don't serve (or backfill) a truncated file
+    except Exception:
+        return None
+    cache.set_bytes(_result_key(resume_id, kind), raw, ttl=RESULT_CACHE_TTL)
+    return raw
+
+def _json_bytes_response(raw: bytes) -> Response:
+    return Response(raw, mimetype="application/json")
+
+def _store_result(resume_id: str, kind: str, result) -> None:
+    cache.set_json(_result_key(resume_id, kind), result, ttl=RESULT_CACHE_TTL)
+    try:
+        with open(f"./uploads/{resume_id}_{kind}.json", "wb") as fh:
+            fh.write(dumps_bytes(result, orjson.OPT_INDENT_2))
+    except Exception:
+        pass
+
+# /review and /report each need an LLM pass over the same resume. With
+# LLM_BUNDLE on, the first of them asks for both parts in one call (resume
+# sent once) and caches the other part for the later request.
+LLM_BUNDLE = os.getenv("LLM_BUNDLE", "1") == "1"
+
+def _llm_resume_part(resume_id: str, raw_text: str, kind: str, single_fn, on_delta=None):
+    other = "analysis" if kind == "review" else "review"
+
+    def compute():
+        if LLM_BUNDLE and llm_cache.get(raw_text, other) is None and _load_result(resume_id, other) is None:
+            try:
+                bundle = analyze_resume_bundle(raw_text, on_delta=on_delta)
+            except Exception as e:
+                print(f"[llm] bundled call failed, falling back: {e}")
+                bundle = {}
+            if bundle.get(other):
+                llm_cache.set(raw_text, other, bundle[other])
+                _store_result(resume_id, other, bundle[other])
+            if bundle.get(kind):
+                return bundle[kind]
+        return single_fn(raw_text, on_delta=on_delta)
+
+    result = llm_cache.cached(kind, raw_text, compute)
+    _store_result(resume_id, kind, result)
+    return result
 
 # ------------------------------
 # Resume / Review
 # ------------------------------
 @app.get("/resume/<resume_id>")
-@jwt_required()
+@jwt_required_cached()
 def get_resume(resume_id: str):
-    parsed = DB["resumes"].get(resume_id)
-    if not parsed:
+    raw = get_resume_bytes(resume_id)
+    if raw is None:
         return jsonify({"error": "Unknown resume_id"}), 404
-    return jsonify(parsed)
+    return _json_bytes_response(raw)
 
 @app.post("/review/<resume_id>")
-@jwt_required()
+@jwt_required_cached()
 def review(resume_id: str):
-    payload = DB["resumes"].get(resume_id)
+    payload = load_resume(resume_id)
     if not payload:
-        # Try to reload from disk if present
-        json_path = f"./uploads/{resume_id}.json"
-        if os.path.exists(json_path):
-            try:
-                with open(json_path, "r", encoding="utf-8") as jf:
-                    payload = json.load(jf)
-                DB.setdefault("resumes", {})[resume_id] = payload
-            except Exception:
-                return jsonify({"error": "Resume could not be loaded from disk"}), 404
-        else:
-            return jsonify({"error": "Unknown resume_id"}), 404
+        return jsonify({"error": "Unknown resume_id"}), 404
 
     raw_text = payload.get("raw_text") or ""
     if not raw_text:
         return jsonify({"error": "No raw_text stored for this resume_id"}), 400
 
-    # Check on-disk cache first
-    cache_path = f"./uploads/{resume_id}_review.json"
-    if os.path.exists(cache_path):
-        try:
-            with open(cache_path, "r", encoding="utf-8") as fh:
-                cached = json.load(fh)
-            return jsonify(cached)
-        except Exception:
-            pass
+    # Check cache (Redis, then disk) first
+    cached = _load_result(resume_id, "review")
+    if cached is not None:
+        return _json_bytes_response(cached)
 
-    # LLM-based review per requested schema
-    result = analyze_resume_review_llm(raw_text)
-
-    try:
-        with open(cache_path, "w", encoding="utf-8") as fh:
-            json.dump(result, fh, ensure_ascii=False, indent=2)
-    except Exception:
-        pass
+    def run_review(on_delta=None):
+        # LLM-based review per requested schema
+        return _llm_resume_part(resume_id, raw_text, "review", analyze_resume_review_llm, on_delta)
 
-    return jsonify(result)
+    if _wants_stream():
+        return _stream_llm(run_review)
+    if _wants_async():
+        return _enqueue("review", raw_text, run_review)
+    return jsonify(run_review())
 
 # ------------------------------
 # Interview (Socket + Insights)
 # ------------------------------
 @app.post("/interview/ai/start")
-@jwt_required()
+@jwt_required_cached()
 def interview_ai_start():
     data = request.get_json(force=True, silent=True) or {}
     resume_id = data.get("resume_id")
     role = data.get("role")
-    if not resume_id or resume_id not in DB["resumes"]:
+    parsed = load_resume(resume_id)
+    if not parsed:
         return jsonify({"error": "Unknown resume_id"}), 404
     session_id = new_id()
-    qs = generate_questions(DB["resumes"][resume_id], role)
-    DB["sessions"][session_id] = {"resume_id": resume_id, "q": qs, "idx": 0, "scores": {}}
+    qs = generate_questions(parsed, role)
+    put_session(session_id, {"resume_id": resume_id, "q": qs, "idx": 0, "scores": {}})
     return jsonify({"session_id": session_id, "first": qs[0] if qs else None})
 
+def _face_state(session_id: str, sess: Dict[str, Any]) -> Dict[str, Any]:
+    """Face state of a session; sessions saved before it had its own key carry it inline."""
+    st = get_face(session_id)
+    if st is None:
+        st = sess.pop("face", None) or _new_face_state()
+    return st
+
 @socketio.on("join_interview")
 def on_join(data):
     session_id = (data or {}).get("session_id")
     if not session_id:
         emit("error", {"error": "missing session_id"}); return
     join_room(session_id)
-    sess = DB["sessions"].get(session_id)
+    sess = get_session(session_id)
     if not sess:
         emit("error", {"error": "unknown session"}); return
-    _finalize_face_summary(sess)  # initializes on first call
+    with session_lock(session_id):
+        if get_face(session_id) is None:
+            put_face(session_id, _face_state(session_id, sess), force=True)
     q = sess["q"][sess["idx"]] if sess["q"] else None
     emit("question", {"question": q}, to=session_id)
 
 SOCKET_LIMITS: Dict[str, Any] = {}
+# (events, per seconds) allowed per session; face_metrics may arrive at ~30 fps.
+# An event over its limit is dropped and answered with an "error" event
+# {error: "rate limited", event, retry_after}.
+SOCKET_EVENT_LIMITS = {"face_metrics": (60, 2.0), "transcript": (10, 5.0)}
+
+# Token bucket shared by all workers: HMGET, refill, take one, HSET + EXPIRE
+# in a single atomic script call.
+_TOKEN_BUCKET_LUA = """
+local limit = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local b = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(b[1]) or limit
+local updated = tonumber(b[2]) or now
+tokens = math.min(limit, tokens + math.max(0, now - updated) * rate)
+local allowed = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+  allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[4]))
+return allowed
+"""
+_token_bucket = None
+
+def _allow_event_redis(key: str, limit: int, per: float, now: float):
+    """Shared-bucket decision, or None when Redis is not configured/reachable."""
+    global _token_bucket
+    r = cache.get_redis()
+    if r is None:
+        return None
+    try:
+        if _token_bucket is None:
+            _token_bucket = r.register_script(_TOKEN_BUCKET_LUA)  # EVALSHA, reloads on NOSCRIPT
+        return bool(_token_bucket(keys=[f"sio:{key}"], args=[limit, limit / per, now, int(per * 2) + 1]))
+    except Exception:
+        return None
 
 def allow_event(key: str, limit=10, per=5.0):
     now = time.time()
@@ -380,25 +576,42 @@ def allow_event(key: str, limit=10, per=5.0):
     bucket["tokens"] = min(limit, bucket["tokens"] + elapsed * (limit / per))
     bucket["updated"] = now
     SOCKET_LIMITS[key] = bucket
-    if bucket["tokens"] >= 1:
-        bucket["tokens"] -= 1
+    if bucket["tokens"] < 1:
+        # This worker alone has used up the budget, so the shared bucket
+        # (which also counts other workers) is empty too: skip the round trip.
+        return False
+    bucket["tokens"] -= 1
+    shared = _allow_event_redis(key, limit, per, now)
+    return True if shared is None else shared
+
+def _allow_socket_event(session_id: str, event: str) -> bool:
+    """Take a token for this session's `event`; when there is none, tell the
+    client the event was dropped and return False."""
+    limit, per = SOCKET_EVENT_LIMITS[event]
+    if allow_event(f"{session_id}:{event}", limit=limit, per=per):
         return True
+    emit("error", {"error": "rate limited", "event": event, "retry_after": round(per / limit, 3)})
     return False
 
 def drop_if_too_big(payload: dict, max_len=4096):
     if not isinstance(payload, dict): return False
     return sum(len(str(v)) for v in payload.values()) <= max_len
 
+# Words that signal a quantified answer; one compiled scan per transcript event
+_IMPACT_KW_RE = re.compile(r"%|users|latency|revenue|cost")
+
 @socketio.on("transcript")
 def on_transcript(data):
     session_id = (data or {}).get("session_id")
     text = ((data or {}).get("text") or "").strip()
-    sess = DB["sessions"].get(session_id)
+    sess = get_session(session_id)
     if not sess:
         emit("error", {"error": "unknown session"}); return
+    if not _allow_socket_event(session_id, "transcript"):
+        return
     # lightweight realtime feedback
     feedback = None
-    if any(x in text for x in ["%", "users", "latency", "revenue", "cost"]):
+    if _IMPACT_KW_RE.search(text):
         feedback = "Great—keep quantifying impact."
     elif len(text.split()) > 30:
         feedback = "Nice depth; mention tools and metrics."
@@ -408,18 +621,23 @@ def on_transcript(data):
 def on_answer_done(data):
     session_id = (data or {}).get("session_id")
     answer = ((data or {}).get("answer") or "")
-    sess = DB["sessions"].get(session_id)
-    if not sess:
-        emit("error", {"error": "unknown session"}); return
-
-    qid = sess["q"][sess["idx"]]["id"]
-    sess["scores"][qid] = score_answer(answer)
-    sess.setdefault("answers", []).append(answer)
-    sess["idx"] += 1
-    _reset_per_question_face_state(sess)
-
-    if sess["idx"] >= len(sess["q"]):
-        face_summary = _finalize_face_summary(sess)
+    with session_lock(session_id):
+        sess = get_session(session_id)
+        if not sess:
+            emit("error", {"error": "unknown session"}); return
+
+        st = _face_state(session_id, sess)
+        qid = sess["q"][sess["idx"]]["id"]
+        sess["scores"][qid] = score_answer(answer)
+        sess.setdefault("answers", []).append(answer)
+        sess["idx"] += 1
+        _reset_per_question_face_state(st)
+        done = sess["idx"] >= len(sess["q"])
+        face_summary = _finalize_face_summary(st) if done else None
+        put_face(session_id, st, force=True)
+        put_session(session_id, sess)
+
+    if done:
         insights = generate_insights(sess["scores"], sess.get("answers", []), face_summary)
         emit("final", {"done": True, "scores": sess["scores"], "face_summary": face_summary, "insights": insights}, to=session_id)
         return
@@ -427,72 +645,95 @@ def on_answer_done(data):
     next_q = sess["q"][sess["idx"]]
     emit("question", {"question": next_q, "progress": f"{sess['idx']}/{len(sess['q'])}"}, to=session_id)
 
+MAX_FACE_BATCH = 120  # frames per face_metrics message (~4 s at 30 fps)
+
 @socketio.on("face_metrics")
 def on_face_metrics(data):
     session_id = (data or {}).get("session_id")
     if not session_id:
         emit("error", {"error": "missing session_id"}); return
-    sess = DB["sessions"].get(session_id)
-    if not sess:
-        emit("error", {"error": "unknown session"}); return
-
-    raw_attention = float(max(0.0, min(1.0, (data.get("attention") or 0.0))))
-    smiling = bool(data.get("smiling") or False)
-    faces = int(max(0, data.get("faces") or 0))
-
-    st = _ensure_face_state(sess)
-    st["ema_attention"] = _ema(st["ema_attention"], raw_attention, alpha=0.25)
-    st["ema_faces"] = _ema(st["ema_faces"], float(faces), alpha=0.4)
-
-    st["frames"] += 1
-    if faces > 0: st["present_frames"] += 1
-    if smiling:   st["smile_frames"] += 1
-
-    now_ts = _now()
-    ATTENTION_LOW, INATTENTIVE_SECS = 0.35, 8.0
-    AWAY_FACES_NONE_SECS, NUDGE_COOLDOWN_SECS = 12.0, 20.0
-    ema_att, ema_faces = st["ema_attention"] or 0.0, st["ema_faces"] or 0.0
-
-    if ema_att < ATTENTION_LOW and faces > 0:
-        if st["inattentive_since"] is None: st["inattentive_since"] = now_ts
-    else:
-        st["inattentive_since"] = None
+    if not _allow_socket_event(session_id, "face_metrics"):
+        return
 
-    if faces == 0:
-        if st["away_since"] is None: st["away_since"] = now_ts
+    # Either one frame {attention, smiling, faces} or a batch {frames: [...]}
+    batch = data.get("frames")
+    if isinstance(batch, list):
+        batch = [f for f in batch[:MAX_FACE_BATCH] if isinstance(f, dict)]
     else:
-        st["away_since"] = None
-
-    last_nudge_ts = st.get("last_nudge_ts")
-    can_nudge = (last_nudge_ts is None) or ((now_ts - last_nudge_ts) >= NUDGE_COOLDOWN_SECS)
-
-    if st["inattentive_since"] and (now_ts - st["inattentive_since"] >= INATTENTIVE_SECS) and can_nudge:
-        emit("feedback", {"feedback": "Tip: Keep eyes on the screen—helps with clarity and presence."}, to=session_id)
-        st["nudges"] += 1; st["nudged_this_question"] = True; st["last_nudge_ts"] = now_ts
-
-    if st["away_since"] and (now_ts - st["away_since"] >= AWAY_FACES_NONE_SECS) and can_nudge:
-        emit("feedback", {"feedback": "We lost the face for a bit—recenter the camera when ready."}, to=session_id)
-        st["nudges"] += 1; st["nudged_this_question"] = True; st["last_nudge_ts"] = now_ts
-
-    if ema_att >= 0.75 and smiling and (st["frames"] % 90 == 0):
-        emit("feedback", {"feedback": "Great presence 👍 Keep it up."}, to=session_id)
+        batch = [data]
+    if not batch:
+        return
+    n = len(batch)
+    attention = np.clip(np.fromiter((float(f.get("attention") or 0.0) for f in batch), np.float64, n), 0.0, 1.0)
+    faces_arr = np.maximum(0, np.fromiter((int(f.get("faces") or 0) for f in batch), np.int64, n))
+    smiling_arr = np.fromiter((bool(f.get("smiling") or False) for f in batch), np.bool_, n)
+
+    # Only the face state is read and written here (under the session lock, so
+    # answer_done's per-question reset can't be lost); the session itself is
+    # read just once, to check it exists, when this worker has no face state
+    with session_lock(session_id):
+        st = get_face(session_id)
+        if st is None:
+            sess = get_session(session_id)
+            if not sess:
+                emit("error", {"error": "unknown session"}); return
+            st = _face_state(session_id, sess)
+        st["ema_attention"] = _ema_fold(st["ema_attention"], attention, alpha=0.25)
+        st["ema_faces"] = _ema_fold(st["ema_faces"], faces_arr.astype(np.float64), alpha=0.4)
+
+        prev_frames = st["frames"]
+        st["frames"] += n
+        st["present_frames"] += int(np.count_nonzero(faces_arr))
+        st["smile_frames"] += int(np.count_nonzero(smiling_arr))
+        # Nudge state follows the most recent frame
+        faces, smiling = int(faces_arr[-1]), bool(smiling_arr[-1])
+
+        now_ts = _now()
+        ATTENTION_LOW, INATTENTIVE_SECS = 0.35, 8.0
+        AWAY_FACES_NONE_SECS, NUDGE_COOLDOWN_SECS = 12.0, 20.0
+        ema_att, ema_faces = st["ema_attention"] or 0.0, st["ema_faces"] or 0.0
+
+        if ema_att < ATTENTION_LOW and faces > 0:
+            if st["inattentive_since"] is None: st["inattentive_since"] = now_ts
+        else:
+            st["inattentive_since"] = None
 
-    last_emit = st.get("last_emit_ts") or 0
-    if now_ts - last_emit >= 1.0:
-        st["last_emit_ts"] = now_ts
-        emit("face_status", {
-            "ema_attention": round(ema_att, 3),
-            "ema_faces": round(ema_faces, 3),
-            "frames": st["frames"],
-            "present_ratio": round(st["present_frames"] / max(1, st["frames"]), 3),
-            "smile_ratio": round(st["smile_frames"] / max(1, st["frames"]), 3),
-        }, to=session_id)
+        if faces == 0:
+            if st["away_since"] is None: st["away_since"] = now_ts
+        else:
+            st["away_since"] = None
+
+        last_nudge_ts = st.get("last_nudge_ts")
+        can_nudge = (last_nudge_ts is None) or ((now_ts - last_nudge_ts) >= NUDGE_COOLDOWN_SECS)
+
+        if st["inattentive_since"] and (now_ts - st["inattentive_since"] >= INATTENTIVE_SECS) and can_nudge:
+            emit("feedback", {"feedback": "Tip: Keep eyes on the screen—helps with clarity and presence."}, to=session_id)
+            st["nudges"] += 1; st["nudged_this_question"] = True; st["last_nudge_ts"] = now_ts
+
+        if st["away_since"] and (now_ts - st["away_since"] >= AWAY_FACES_NONE_SECS) and can_nudge:
+            emit("feedback", {"feedback": "We lost the face for a bit—recenter the camera when ready."}, to=session_id)
+            st["nudges"] += 1; st["nudged_this_question"] = True; st["last_nudge_ts"] = now_ts
+
+        if ema_att >= 0.75 and smiling and (st["frames"] // 90 > prev_frames // 90):
+            emit("feedback", {"feedback": "Great presence 👍 Keep it up."}, to=session_id)
+
+        last_emit = st.get("last_emit_ts") or 0
+        if now_ts - last_emit >= 1.0:
+            st["last_emit_ts"] = now_ts
+            emit("face_status", {
+                "ema_attention": round(ema_att, 3),
+                "ema_faces": round(ema_faces, 3),
+                "frames": st["frames"],
+                "present_ratio": round(st["present_frames"] / max(1, st["frames"]), 3),
+                "smile_ratio": round(st["smile_frames"] / max(1, st["frames"]), 3),
+            }, to=session_id)
+        put_face(session_id, st)
 
 # ------------------------------
 # Jobs / Match
 # ------------------------------
 @app.post("/match/<resume_id>")
-@jwt_required()
+@jwt_required_cached()
 def match(resume_id: str):
     data = request.get_json(force=True, silent=True) or {}
     print(f"[MATCH API] Received payload: {data}")
@@ -503,19 +744,10 @@ def match(resume_id: str):
     if work_mode == "hybrid":
         work_mode = "any"
 
-    parsed = DB["resumes"].get(resume_id)
+    parsed = load_resume(resume_id)
     if not parsed:
-        # Try to reload from disk if present
-        json_path = f"./uploads/{resume_id}.json"
-        if os.path.exists(json_path):
-            try:
-                with open(json_path, "r", encoding="utf-8") as jf:
-                    parsed = json.load(jf)
-                DB.setdefault("resumes", {})[resume_id] = parsed
-            except Exception:
-                return jsonify({"error": "Resume could not be loaded from disk"}), 404
-        else:
-            return jsonify({"error": "Unknown resume_id"}), 404
+        return jsonify({"error": "Unknown resume_id"}), 404
+    parsed = _ensure_structured(resume_id, parsed)
 
     skills = (skills_override or parsed.get("skills", {}).get("hard", [])) or ["python"]
     jobs = rank_jobs(skills, region, roles=None, countries=countries, mode=work_mode)
@@ -529,25 +761,30 @@ def match(resume_id: str):
 
 @app.get("/debug/scrape/<resume_id>")
 def debug_scrape(resume_id: str):
-    parsed = DB["resumes"].get(resume_id)
+    parsed = load_resume(resume_id)
     if not parsed: return jsonify({"error":"Unknown resume_id"}), 404
+    parsed = _ensure_structured(resume_id, parsed)
     skills = parsed.get("skills",{}).get("hard",[]) or ["python","react","fastapi"]
-    from sources.noauth_jobs import remoteok, remotive, arbeitnow, weworkremotely
-    out = {
-        "skills_used": skills[:12],
-        "remoteok": len(remoteok(skills)),
-        "remotive": len(remotive(skills)),
-        "arbeitnow": len(arbeitnow(skills, pages=1)),
-        "weworkremotely": len(weworkremotely(skills, max_pages=1)),
-    }
+    from sources.noauth_jobs import remoteok, remotive, arbeitnow, weworkremotely, fetch_concurrently, build_matcher
+    match = build_matcher(skills)
+    found = fetch_concurrently({
+        "remoteok": lambda: remoteok(skills, match),
+        "remotive": lambda: remotive(skills, match),
+        "arbeitnow": lambda: arbeitnow(skills, pages=1, match=match),
+        "weworkremotely": lambda: weworkremotely(skills, max_pages=1, match=match),
+    })
+    out = {"skills_used": skills[:12]}
+    for name in ("remoteok", "remotive", "arbeitnow", "weworkremotely"):
+        out[name] = len(found[name]) if name in found else None  # None: timed out or failed
     return jsonify(out)
 
 @app.post("/match/auto/<resume_id>")
-@jwt_required()
+@jwt_required_cached()
 def match_auto(resume_id: str):
-    parsed = DB["resumes"].get(resume_id)
+    parsed = load_resume(resume_id)
     if not parsed:
         return jsonify({"error": "Unknown resume_id"}), 404
+    parsed = _ensure_structured(resume_id, parsed)
     from matcher import rank_from_resume
     jobs = rank_from_resume(parsed)
     return jsonify({
@@ -561,10 +798,10 @@ def match_auto(resume_id: str):
 # Footprint
 # ------------------------------
 @app.post("/footprint/<resume_id>")
-@jwt_required()
+@jwt_required_cached()
 def footprint(resume_id: str):
     data = request.get_json(force=True, silent=True) or {}
-    parsed = DB["resumes"].get(resume_id)
+    parsed = load_resume(resume_id)
     if not parsed:
         return jsonify({"error": "Unknown resume_id"}), 404
     gh = data.get("github_username")
@@ -575,63 +812,46 @@ def footprint(resume_id: str):
 # Career Insights Report
 # ------------------------------
 @app.post("/report/<resume_id>")
-@jwt_required()
+@jwt_required_cached()
 def report(resume_id: str):
     """Build a career report that combines resume review and a 6‑month plan.
 
     Today this is powered by a single LLM call on the raw resume text.
     Later we can thread in interview insights, footprint, or top job matches.
     """
-    payload = DB["resumes"].get(resume_id)
+    payload = load_resume(resume_id)
     if not payload:
-        # Try to reload from disk if present (mirror /review behavior)
-        json_path = f"./uploads/{resume_id}.json"
-        if os.path.exists(json_path):
-            try:
-                with open(json_path, "r", encoding="utf-8") as jf:
-                    payload = json.load(jf)
-                DB.setdefault("resumes", {})[resume_id] = payload
-            except Exception:
-                return jsonify({"error": "Resume could not be loaded from disk"}), 404
-        else:
-            return jsonify({"error": "Unknown resume_id"}), 404
+        return jsonify({"error": "Unknown resume_id"}), 404
 
     raw_text = payload.get("raw_text") or ""
     if not raw_text:
         return jsonify({"error": "No raw_text stored for this resume_id"}), 400
 
-    analysis_path = f"./uploads/{resume_id}_analysis.json"
-    if os.path.exists(analysis_path):
-        try:
-            with open(analysis_path, "r", encoding="utf-8") as fh:
-                cached = json.load(fh)
-            return jsonify(cached)
-        except Exception:
-            pass
-
-    analysis = analyze_resume_with_llm(raw_text)
+    cached = _load_result(resume_id, "analysis")
+    if cached is not None:
+        return _json_bytes_response(cached)
 
-    try:
-        with open(analysis_path, "w", encoding="utf-8") as fh:
-            json.dump(analysis, fh, ensure_ascii=False, indent=2)
-    except Exception:
-        pass
+    def run_report(on_delta=None):
+        return _llm_resume_part(resume_id, raw_text, "analysis", analyze_resume_with_llm, on_delta)
 
-    return jsonify(analysis)
+    if _wants_stream():
+        return _stream_llm(run_report)
+    if _wants_async():
+        return _enqueue("report", raw_text, run_report)
+    return jsonify(run_report())
 
 # ------------------------------
 # Delete Resume (reset CV)
 # ------------------------------
 @app.delete("/resume/<resume_id>")
-@jwt_required()
+@jwt_required_cached()
 def delete_resume(resume_id: str):
     """Delete resume payload, encrypted file, and cached analyses.
 
     This lets the user reset their CV and upload a new one cleanly.
     """
-    # Remove in-memory entries
-    DB.get("resumes", {}).pop(resume_id, None)
-    file_meta = DB.get("files", {}).pop(resume_id, None)
+    # Remove in-memory / Redis entries
+    file_meta = drop_resume(resume_id)
 
     # Remove JSON payload
     json_path = f"./uploads/{resume_id}.json"
@@ -643,6 +863,9 @@ def delete_resume(resume_id: str):
 
     # Remove encrypted file if we have its path
     if file_meta and isinstance(file_meta, dict):
+        if file_meta.get("sha256"):
+            forget_upload(file_meta.get("owner") or "", file_meta["sha256"])
+            forget_parsed(file_meta["sha256"])
         enc_path = file_meta.get("enc_path")
         if enc_path and os.path.exists(enc_path):
             try:
@@ -650,7 +873,8 @@ def delete_resume(resume_id: str):
             except Exception:
                 pass
 
-    # Remove cached review and analysis files if present
+    # Remove cached review and analysis (Redis + files) if present
+    cache.delete(*(_result_key(resume_id, kind) for kind in ("review", "analysis")))
     review_path = f"./uploads/{resume_id}_review.json"
     if os.path.exists(review_path):
         try:
@@ -670,57 +894,55 @@ def delete_resume(resume_id: str):
 # ------------------------------
 # AI Aids: Tailor Resume & Cover Letter
 # ------------------------------
+def _with_job(raw_text: str, job: Dict[str, Any]) -> str:
+    """Cache text for job-specific LLM calls: the resume plus the target job."""
+    return raw_text + "\n\n" + json.dumps(job, sort_keys=True, ensure_ascii=False)
+
 @app.post("/ai/refine_resume_for_job")
-@jwt_required()
+@jwt_required_cached()
 def ai_refine_resume_for_job():
     data = request.get_json(force=True, silent=True) or {}
     resume_id = data.get("resume_id")
     job = data.get("job") or {}
     if not resume_id:
         return jsonify({"error": "resume_id required"}), 400
-    payload = DB["resumes"].get(resume_id)
+    payload = load_resume(resume_id)
     if not payload:
-        json_path = f"./uploads/{resume_id}.json"
-        if os.path.exists(json_path):
-            try:
-                with open(json_path, "r", encoding="utf-8") as jf:
-                    payload = json.load(jf)
-                DB.setdefault("resumes", {})[resume_id] = payload
-            except Exception:
-                return jsonify({"error": "Resume could not be loaded from disk"}), 404
-        else:
-            return jsonify({"error": "Unknown resume_id"}), 404
+        return jsonify({"error": "Unknown resume_id"}), 404
     raw_text = payload.get("raw_text") or ""
     if not raw_text:
         return jsonify({"error": "No raw_text stored for this resume_id"}), 400
-    result = refine_resume_for_job_llm(raw_text, job)
-    return jsonify(result)
+    def run_refine(on_delta=None):
+        return llm_cache.cached("refine", _with_job(raw_text, job), lambda: refine_resume_for_job_llm(raw_text, job, on_delta=on_delta))
+
+    if _wants_stream():
+        return _stream_llm(run_refine)
+    if _wants_async():
+        return _enqueue("refine_resume_for_job", raw_text, run_refine, extra=job)
+    return jsonify(run_refine())
 
 @app.post("/ai/cover_letter")
-@jwt_required()
+@jwt_required_cached()
 def ai_cover_letter():
     data = request.get_json(force=True, silent=True) or {}
     resume_id = data.get("resume_id")
     job = data.get("job") or {}
     if not resume_id:
         return jsonify({"error": "resume_id required"}), 400
-    payload = DB["resumes"].get(resume_id)
+    payload = load_resume(resume_id)
     if not payload:
-        json_path = f"./uploads/{resume_id}.json"
-        if os.path.exists(json_path):
-            try:
-                with open(json_path, "r", encoding="utf-8") as jf:
-                    payload = json.load(jf)
-                DB.setdefault("resumes", {})[resume_id] = payload
-            except Exception:
-                return jsonify({"error": "Resume could not be loaded from disk"}), 404
-        else:
-            return jsonify({"error": "Unknown resume_id"}), 404
+        return jsonify({"error": "Unknown resume_id"}), 404
     raw_text = payload.get("raw_text") or ""
     if not raw_text:
         return jsonify({"error": "No raw_text stored for this resume_id"}), 400
-    result = generate_cover_letter_llm(raw_text, job)
-    return jsonify(result)
+    def run_cover_letter(on_delta=None):
+        return llm_cache.cached("cover_letter", _with_job(raw_text, job), lambda: generate_cover_letter_llm(raw_text, job, on_delta=on_delta))
+
+    if _wants_stream():
+        return _stream_llm(run_cover_letter)
+    if _wants_async():
+        return _enqueue("cover_letter", raw_text, run_cover_letter, extra=job)
+    return jsonify(run_cover_letter())
 
 # ------------------------------
 # Entrypoint
@@ -1,21 +1,37 @@
 # auth.py
 from __future__ import annotations
-import os, re
+import hashlib, os, re, threading, time
+from collections import OrderedDict
 from datetime import timedelta
-from typing import List
+from functools import wraps
+from typing import Any, Dict, List, Optional, Tuple
 
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, g
 from flask_cors import cross_origin
-from flask_jwt_extended import create_access_token
+from flask_jwt_extended import create_access_token, decode_token
+from flask_jwt_extended.exceptions import NoAuthorizationError, WrongTokenError
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 
-from auth_store import find_user, create_user, verify_password, seed_admin
+from cache import RATELIMIT_STORAGE_URI, RATELIMIT_STORAGE_OPTIONS
+from auth_store import find_user, create_user, verify_and_upgrade, verify_unknown, seed_admin, init_db, LOGIN_PROJECTION
+from helpers import run_native
 
 auth_bp = Blueprint("auth", __name__)
 
-# rate limiter; will be bound to app in init_auth()
-limiter = Limiter(key_func=get_remote_address, default_limits=["200/hour"])
+# rate limiter shared with app.py's routes; bound to the app in init_auth().
+# Like cache.py, Redis is optional here: if it is unreachable the counters
+# fall back to per-process memory instead of failing the request.
+limiter = Limiter(
+    key_func=get_remote_address,
+    default_limits=["200/hour"],
+    storage_uri=RATELIMIT_STORAGE_URI,
+    storage_options=RATELIMIT_STORAGE_OPTIONS,
+    strategy="moving-window",
+    key_prefix="rl",
+    in_memory_fallback_enabled=True,
+    swallow_errors=True,
+)
 
 # CORS origins for these endpoints
 DEFAULT_ORIGINS = [
@@ -38,14 +54,52 @@ def _origins():
         pass
     return DEFAULT_ORIGINS
 
+_CORS_ORIGINS = _origins()
+
 EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
 
+# Recent successful password checks, so a client logging in repeatedly skips
+# the bcrypt work. Only successes are cached (every wrong guess still pays the
+# full KDF), and the key mixes in the stored hash so a password change or
+# rehash misses. Keys are blake2b under a per-process secret: no plaintext,
+# and nothing reusable outside this process.
+LOGIN_CACHE_TTL = 30.0
+LOGIN_CACHE_MAX = 4096
+_login_ok: "OrderedDict[str, float]" = OrderedDict()
+_login_lock = threading.Lock()
+_login_secret = os.urandom(32)
+
+# Password hashing is pure CPU (bcrypt releases the GIL while it works), so
+# it goes through run_native: under gevent that is the hub threadpool, which
+# keeps every other greenlet in the worker served.
+
+def _login_key(email: str, pw_hash: str, password: str) -> str:
+    h = hashlib.blake2b(key=_login_secret, digest_size=16)
+    h.update(f"{email}\0{pw_hash}\0{password}".encode("utf-8"))
+    return h.hexdigest()
+
+def _verify_cached(user: Dict[str, Any], password: str) -> bool:
+    key = _login_key(user["email"], user.get("pw_hash", ""), password)
+    now = time.monotonic()
+    with _login_lock:
+        expires = _login_ok.get(key)
+        if expires is not None and expires > now:
+            return True
+    if not verify_and_upgrade(user, password, run_kdf=run_native):
+        return False
+    with _login_lock:
+        _login_ok[key] = now + LOGIN_CACHE_TTL
+        _login_ok.move_to_end(key)
+        while len(_login_ok) > LOGIN_CACHE_MAX:
+            _login_ok.popitem(last=False)
+    return True
+
 def _password_ok(p: str) -> bool:
     # Min 8 chars, at least 1 letter & 1 digit (tune as needed)
     return bool(len(p) >= 8 and re.search(r"[A-Za-z]", p) and re.search(r"\d", p))
 
 @auth_bp.route("/login", methods=["POST","OPTIONS"], strict_slashes=False)
-@cross_origin(origins=_origins(), allow_headers=["Content-Type","Authorization"],
+@cross_origin(origins=_CORS_ORIGINS, allow_headers=["Content-Type","Authorization"],
               methods=["POST","OPTIONS"], max_age=600)
 @limiter.limit("10/minute")
 def login():
@@ -60,8 +114,11 @@ def login():
     if not email or not password:
         return jsonify({"error":"email and password are required"}), 400
 
-    user = find_user(email)
-    if not user or not verify_password(password, user.get("pw_hash","")):
+    user = find_user(email, LOGIN_PROJECTION)
+    if not user:
+        verify_unknown(password, run_kdf=run_native)
+        return jsonify({"error":"invalid credentials"}), 401
+    if not _verify_cached(user, password):
         return jsonify({"error":"invalid credentials"}), 401
 
     claims = {"roles": user.get("roles", []), "email": user["email"]}
@@ -69,7 +126,7 @@ def login():
     return jsonify({"access_token": token, "token_type":"Bearer", "expires_in": 900}), 200
 
 @auth_bp.route("/register", methods=["POST","OPTIONS"], strict_slashes=False)
-@cross_origin(origins=_origins(), allow_headers=["Content-Type","Authorization"],
+@cross_origin(origins=_CORS_ORIGINS, allow_headers=["Content-Type","Authorization"],
               methods=["POST","OPTIONS"], max_age=600)
 @limiter.limit("5/minute")
 def register():
@@ -101,6 +158,68 @@ def register():
                                 expires_delta=timedelta(minutes=15))
     return jsonify({"access_token": token, "token_type":"Bearer", "expires_in": 900}), 201
 
+# Verified access-token claims, keyed by the raw bearer token. A hit skips the
+# signature check and JSON decode; entries live JWT_CACHE_TTL seconds at most
+# and never past the token's own "exp".
+JWT_CACHE_TTL = 5.0
+JWT_CACHE_MAX = 10_000
+_jwt_cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+_jwt_lock = threading.Lock()
+
+def _bearer_token() -> Optional[str]:
+    auth = request.headers.get("Authorization") or ""
+    if not auth.startswith("Bearer "):
+        return None
+    return auth[7:].strip() or None
+
+def verified_claims(token: str) -> Dict[str, Any]:
+    """Claims of a valid access token, from the cache or decode_token().
+
+    decode_token() checks signature and expiry and raises otherwise (the
+    JWTManager error handlers turn that into the usual 401/422). Per-request
+    checks such as a revocation list must go here, ahead of the cache lookup.
+    """
+    now = time.time()
+    with _jwt_lock:
+        hit = _jwt_cache.get(token)
+    if hit is not None and hit[0] > now:
+        return hit[1]
+    claims = decode_token(token)
+    if claims.get("type") != "access":
+        raise WrongTokenError("Only non-refresh tokens are allowed")
+    expires = now + JWT_CACHE_TTL
+    if claims.get("exp"):
+        expires = min(expires, float(claims["exp"]))
+    with _jwt_lock:
+        _jwt_cache[token] = (expires, claims)
+        _jwt_cache.move_to_end(token)
+        while len(_jwt_cache) > JWT_CACHE_MAX:
+            _jwt_cache.popitem(last=False)
+    return claims
+
+def current_claims() -> Dict[str, Any]:
+    """Claims of this request's token, as checked by @jwt_required_cached()."""
+    claims = g.get("jwt_claims")
+    if claims is None:
+        raise RuntimeError("current_claims() needs @jwt_required_cached() on the route")
+    return claims
+
+def jwt_required_cached():
+    """Stand-in for flask_jwt_extended's jwt_required() (bearer tokens in the
+    Authorization header) backed by the claims cache; read the claims with
+    current_claims()."""
+    def wrapper(fn):
+        @wraps(fn)
+        def decorator(*args, **kwargs):
+            if request.method != "OPTIONS":
+                token = _bearer_token()
+                if not token:
+                    raise NoAuthorizationError("Missing Authorization Header")
+                g.jwt_claims = verified_claims(token)
+            return current_app.ensure_sync(fn)(*args, **kwargs)
+        return decorator
+    return wrapper
+
 # Optional: seed admin from env on startup (call from init_auth)
 def _maybe_seed_admin_from_env():
     admin_email = os.getenv("ADMIN_EMAIL") or ""
@@ -108,6 +227,12 @@ def _maybe_seed_admin_from_env():
     if admin_email and admin_pw:
         seed_admin(admin_email, admin_pw)
 
+def _init_db_quietly():
+    try:
+        init_db()
+    except Exception as e:
+        print(f"[auth] Mongo index setup failed: {e}")
+
 def init_auth(app):
     """
     Call once from app.py:
@@ -116,4 +241,9 @@ def init_auth(app):
         init_auth(app)
     """
     limiter.init_app(app)
+    # Index creation talks to Mongo; keep it off the import/startup path
+    threading.Thread(target=_init_db_quietly, daemon=True).start()
+    # Build the dummy hash now rather than on the first unknown-email login,
+    # on a native thread and without holding up startup
+    threading.Thread(target=run_native, args=(verify_unknown, ""), daemon=True).start()
     _maybe_seed_admin_from_env()
@@ -1,56 +1,108 @@
 # auth_store.py
 from __future__ import annotations
-import os
+import functools, os
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 
-from passlib.hash import bcrypt, bcrypt_sha256, pbkdf2_sha256 # <-- add bcrypt_sha256
+from passlib.context import CryptContext
 from pymongo import MongoClient, ASCENDING, ReturnDocument
 from pymongo.errors import DuplicateKeyError
 from bson import ObjectId
 
+from config import BCRYPT_ROUNDS
+
 
 # -------- Mongo connection --------
 MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
 MONGO_DB  = os.getenv("MONGO_DB", "cs_chall")
 
-_client: Optional[MongoClient] = None
-_db = None
+# Optional wire compression (e.g. "zlib"; "zstd" also needs pymongo[zstd]). Off by default
+MONGO_COMPRESSORS = [c.strip() for c in os.getenv("MONGO_COMPRESSORS", "").split(",") if c.strip()]
 
+@functools.lru_cache(maxsize=1)
 def _get_db():
-    global _client, _db
-    if _db is not None:
-        return _db
-    _client = MongoClient(MONGO_URI, serverSelectionTimeoutMS=5000)
-    _db = _client[MONGO_DB]
-    # Ensure indexes once
-    _db.users.create_index([("email", ASCENDING)], unique=True, name="uniq_email")
-    _db.resumes.create_index([("user_id", ASCENDING)], name="resumes_user")
-    _db.resumes.create_index([("created_at", ASCENDING)], name="resumes_created")
-    _db.sessions.create_index([("user_id", ASCENDING)], name="sessions_user")
-    return _db
+    client = MongoClient(
+        MONGO_URI,
+        serverSelectionTimeoutMS=5000,
+        maxPoolSize=100,
+        compressors=MONGO_COMPRESSORS,
+    )
+    return client[MONGO_DB]
+
+def init_db() -> None:
+    """Create indexes once at startup (idempotent; see init_auth)."""
+    db = _get_db()
+    db.users.create_index([("email", ASCENDING)], unique=True, name="uniq_email")
+    db.resumes.create_index([("user_id", ASCENDING)], name="resumes_user")
+    db.resumes.create_index([("created_at", ASCENDING)], name="resumes_created")
+    db.sessions.create_index([("user_id", ASCENDING)], name="sessions_user")
 
 # -------- Users --------
-def find_user(email: str) -> Optional[Dict[str, Any]]:
+# Fields /login needs; keeps resume metadata and the rest of the doc off the wire
+LOGIN_PROJECTION = {"email": 1, "pw_hash": 1, "roles": 1, "_id": 0}
+
+def find_user(email: str, projection: Optional[Dict[str, int]] = None) -> Optional[Dict[str, Any]]:
     db = _get_db()
-    return db.users.find_one({"email": (email or "").lower().strip()})
+    return db.users.find_one({"email": (email or "").lower().strip()}, projection)
+
+# New hashes use bcrypt_sha256 (no 72-byte truncation); older pbkdf2_sha256
+# hashes still verify and are rehashed on the next successful login.
+_pwd_ctx = CryptContext(
+    schemes=["bcrypt_sha256", "pbkdf2_sha256"],
+    deprecated="auto",
+    bcrypt_sha256__rounds=BCRYPT_ROUNDS,
+)
 
 def _hash_password(pw: str) -> str:
-    # strong defaults: 29000+ rounds; can set .using(rounds=...) if desired
-    return pbkdf2_sha256.hash(pw)
+    return _pwd_ctx.hash(pw)
 
 def verify_password(pw: str, pw_hash: str) -> bool:
     try:
-        return pbkdf2_sha256.verify(pw, pw_hash)
+        return _pwd_ctx.verify(pw, pw_hash)
+    except Exception:
+        return False
+
+@functools.lru_cache(maxsize=1)
+def _dummy_hash() -> str:
+    return _pwd_ctx.hash(os.urandom(16).hex())
+
+def verify_unknown(pw: str, run_kdf=None) -> bool:
+    """Spend a real hash check for an email with no account, then fail.
+
+    Answering such logins without the KDF would reveal which emails exist.
+    """
+    (run_kdf or (lambda fn, *args: fn(*args)))(_pwd_ctx.verify, pw, _dummy_hash())
+    return False
+
+def verify_and_upgrade(user: Dict[str, Any], pw: str, run_kdf=None) -> bool:
+    """Check `pw` for `user`; rehash with the current scheme/cost when outdated.
+
+    `run_kdf(fn, *args)` lets the caller move the hash computation to another
+    thread; the Mongo update stays on the calling one.
+    """
+    try:
+        if run_kdf is None:
+            ok, new_hash = _pwd_ctx.verify_and_update(pw, user.get("pw_hash", ""))
+        else:
+            ok, new_hash = run_kdf(_pwd_ctx.verify_and_update, pw, user.get("pw_hash", ""))
     except Exception:
         return False
+    if ok and new_hash:
+        try:
+            _get_db().users.update_one(
+                {"email": user["email"]},
+                {"$set": {"pw_hash": new_hash, "updated_at": datetime.utcnow()}},
+            )
+        except Exception as e:
+            print(f"[auth_store] password rehash failed: {e}")
+    return ok
 
 def create_user(email: str, password: str, name: str = "", roles: Optional[List[str]] = None) -> Dict[str, Any]:
     roles = roles or ["user"]
     db = _get_db()
     doc = {
         "email": (email or "").lower().strip(),
-        "pw_hash": _hash_password(password),  # <-- use bcrypt_sha256
+        "pw_hash": _hash_password(password),
         "name": (name or "").strip(),
         "roles": roles,
         "created_at": datetime.utcnow(),
@@ -65,7 +117,7 @@ def create_user(email: str, password: str, name: str = "", roles: Optional[List[
 def seed_admin(email: str, password: str, name: str = "Admin") -> Dict[str, Any]:
     db = _get_db()
     email_n = (email or "").lower().strip()
-    pw_hash = _hash_password(password)       # <-- use bcrypt_sha256
+    pw_hash = _hash_password(password)
     doc = db.users.find_one_and_update(
         {"email": email_n},
         {"$set": {"email": email_n, "name": name, "roles": ["admin"], "pw_hash": pw_hash, "updated_at": datetime.utcnow()},
@@ -77,7 +129,7 @@ def seed_admin(email: str, password: str, name: str = "Admin") -> Dict[str, Any]
 # -------- Resumes (metadata; blob stored encrypted on disk/S3) --------
 def save_resume(user_email: str, enc_path: str, mime: str, meta: Dict[str, Any]) -> str:
     db = _get_db()
-    user = find_user(user_email)
+    user = find_user(user_email, {"_id": 1, "email": 1})
     if not user:
         raise ValueError("unknown_user")
     doc = {
@@ -0,0 +1,73 @@
+# cache.py
+from __future__ import annotations
+import os
+from typing import Any, Optional
+
+import orjson
+import redis
+
+# Shared Redis for caches. Optional: with REDIS_URL unset every call is a
+# miss / no-op and callers keep their in-process or on-disk behaviour.
+REDIS_URL = os.getenv("REDIS_URL", "")
+
+# Flask-Limiter counters: shared across workers when Redis is configured
+RATELIMIT_STORAGE_URI = os.getenv("RATELIMIT_STORAGE_URL") or REDIS_URL or "memory://"
+RATELIMIT_STORAGE_OPTIONS = {"max_connections": 50} if RATELIMIT_STORAGE_URI.startswith("redis") else {}
+
+_redis: Optional[redis.Redis] = None
+
+def get_redis() -> Optional[redis.Redis]:
+    global _redis
+    if not REDIS_URL:
+        return None
+    if _redis is None:
+        _redis = redis.Redis.from_url(REDIS_URL, socket_timeout=1.0, socket_connect_timeout=1.0)
+    return _redis
+
+def get_bytes(key: str) -> Optional[bytes]:
+    """Stored value as-is, e.g. serialized JSON to send without re-encoding."""
+    r = get_redis()
+    if r is None:
+        return None
+    try:
+        return r.get(key)
+    except redis.RedisError:
+        return None
+
+def set_bytes(key: str, value: bytes, ttl: Optional[int] = None) -> bool:
+    r = get_redis()
+    if r is None:
+        return False
+    try:
+        r.set(key, value, ex=ttl)
+        return True
+    except redis.RedisError:
+        return False
+
+def get_json(key: str) -> Optional[Any]:
+    raw = get_bytes(key)
+    if raw is None:
+        return None
+    try:
+        return orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        return None
+
+def set_json(key: str, value: Any, ttl: Optional[int] = None) -> bool:
+    r = get_redis()
+    if r is None:
+        return False
+    try:
+        r.set(key, orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS), ex=ttl)
+        return True
+    except (redis.RedisError, TypeError):
+        return False
+
+def delete(*keys: str) -> None:
+    r = get_redis()
+    if r is None or not keys:
+        return
+    try:
+        r.delete(*keys)
+    except redis.RedisError:
+        pass
@@ -6,6 +6,9 @@ def _csv_env(name: str, default: str = "") -> list[str]:
     # split only if non-empty; strip whitespace
     return [x.strip() for x in val.split(",")] if val else []
 
+# bcrypt cost factor for password hashes (2^rounds iterations); see auth_store.py
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
 class BaseConfig:
     DEBUG = False
     TESTING = False
@@ -23,6 +26,9 @@ class BaseConfig:
     # Uploads
     ALLOWED_EXTS = {"pdf", "txt", "doc", "docx"}
 
+    # Password hashing
+    BCRYPT_ROUNDS = BCRYPT_ROUNDS
+
 class DevConfig(BaseConfig):
     DEBUG = True
 
@@ -37,4 +43,8 @@ class ProdConfig(BaseConfig):
 def validate_required_secrets():
     if os.getenv("ENV") == "prod":
         if not os.getenv("APP_SECRET_KEY") or not os.getenv("JWT_SECRET_KEY"):
-            raise RuntimeError("APP_SECRET_KEY and JWT_SECRET_KEY must be set in production")
\ No newline at end of file
+            raise RuntimeError("APP_SECRET_KEY and JWT_SECRET_KEY must be set in production")
+    if not 4 <= BCRYPT_ROUNDS <= 31:
+        raise RuntimeError("BCRYPT_ROUNDS must be between 4 and 31")
+    if BCRYPT_ROUNDS < 10:
+        print(f"[config] WARNING: BCRYPT_ROUNDS={BCRYPT_ROUNDS} is below 10; password hashes are cheap to brute-force")
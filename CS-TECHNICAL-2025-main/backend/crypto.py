@@ -0,0 +1,133 @@
+# crypto.py
+from __future__ import annotations
+import base64, os, struct
+from typing import Optional, Dict, Any, BinaryIO
+
+from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from cryptography.hazmat.backends.openssl import backend as _openssl_backend
+from cryptography.hazmat.primitives.ciphers.algorithms import AES
+
+# Prefer the Rust Fernet implementation when installed; it emits standard
+# Fernet tokens, so blobs written by either backend decrypt with the other.
+try:
+    from rfernet import Fernet as _RFernet
+except ImportError:
+    _RFernet = None
+
+
+class _RFernetAdapter:
+    """Expose rfernet with the bytes-in/bytes-out API of cryptography's Fernet."""
+
+    def __init__(self, key: str):
+        self._f = _RFernet(key)
+
+    def encrypt(self, data: bytes) -> bytes:
+        return self._f.encrypt(data).encode("ascii")
+
+    def decrypt(self, token: bytes) -> bytes:
+        if isinstance(token, (bytes, bytearray)):
+            token = bytes(token).decode("ascii")
+        return self._f.decrypt(token)
+
+
+def make_fernet(key: Optional[str]):
+    """Build a Fernet cipher for `key`, or None when no key is configured."""
+    if not key:
+        return None
+    if _RFernet is not None:
+        try:
+            return _RFernetAdapter(key)
+        except ValueError:
+            # rfernet rejects some keys cryptography accepts; let the
+            # reference implementation decide (and raise) for those.
+            pass
+    return Fernet(key.encode())
+
+
+# Uploaded files are encrypted as a stream of AES-GCM chunks so neither the
+# plaintext nor the ciphertext has to sit in memory as one buffer. Layout:
+#   MAGIC | nonce prefix (7 bytes) | chunk* where chunk = ciphertext+tag
+# Each chunk's nonce is prefix | counter (4 bytes) | last-chunk flag (1 byte),
+# which stops chunks from being reordered, dropped or truncated unnoticed.
+# Blobs without MAGIC are legacy Fernet tokens and still decrypt.
+STREAM_MAGIC = b"ACS1"
+STREAM_CHUNK_SIZE = 64 * 1024
+_NONCE_PREFIX_LEN = 7
+_TAG_LEN = 16
+
+
+def _chunk_nonce(prefix: bytes, counter: int, last: bool) -> bytes:
+    return prefix + struct.pack(">IB", counter, 1 if last else 0)
+
+
+class BlobCipher:
+    """Chunked AES-GCM for stored files, keyed off FERNET_KEY."""
+
+    def __init__(self, key: str, fernet):
+        self._fernet = fernet
+        # Separate subkey so the stream format never reuses Fernet's keys directly
+        self._aead = AESGCM(HKDF(
+            algorithm=hashes.SHA256(), length=32, salt=None, info=b"resume-blob-v1",
+        ).derive(base64.urlsafe_b64decode(key)))
+
+    def encrypt_stream(self, src: BinaryIO, dst: BinaryIO, chunk_size: int = STREAM_CHUNK_SIZE) -> int:
+        """Encrypt `src` into `dst` chunk by chunk; returns plaintext bytes read."""
+        prefix = os.urandom(_NONCE_PREFIX_LEN)
+        dst.write(STREAM_MAGIC + prefix)
+        total, counter = 0, 0
+        chunk = src.read(chunk_size)
+        while True:
+            nxt = src.read(chunk_size) if chunk else b""
+            last = not nxt
+            dst.write(self._aead.encrypt(_chunk_nonce(prefix, counter, last), chunk, None))
+            total += len(chunk)
+            if last:
+                return total
+            chunk, counter = nxt, counter + 1
+
+    def decrypt(self, blob: bytes, chunk_size: int = STREAM_CHUNK_SIZE) -> bytes:
+        if not blob.startswith(STREAM_MAGIC):
+            return self._fernet.decrypt(blob)
+        pos = len(STREAM_MAGIC)
+        prefix = blob[pos:pos + _NONCE_PREFIX_LEN]
+        pos += _NONCE_PREFIX_LEN
+        step = chunk_size + _TAG_LEN
+        out, counter = [], 0
+        while True:
+            part = blob[pos:pos + step]
+            pos += step
+            last = pos >= len(blob)
+            out.append(self._aead.decrypt(_chunk_nonce(prefix, counter, last), part, None))
+            if last:
+                return b"".join(out)
+            counter += 1
+
+
+def make_blob_cipher(key: Optional[str]) -> Optional[BlobCipher]:
+    """Build the chunked file cipher for `key`, or None when no key is configured."""
+    fernet = make_fernet(key)
+    if fernet is None:
+        return None
+    return BlobCipher(key, fernet)
+
+
+def backend_info() -> Dict[str, Any]:
+    """Describe the crypto stack so a slow (non-EVP / no AES-NI) build is visible."""
+    return {
+        "fernet": "rfernet" if _RFernet is not None else "cryptography",
+        "openssl": _openssl_backend.openssl_version_text(),
+        "aes_module": AES.__module__,
+        # OPENSSL_ia32cap can mask CPU features; "~0x200000200000000" disables AES-NI
+        "openssl_ia32cap": os.getenv("OPENSSL_ia32cap") or "",
+    }
+
+
+def log_backend_info() -> None:
+    info = backend_info()
+    print(f"[crypto] fernet={info['fernet']} openssl={info['openssl']!r} aes={info['aes_module']}")
+    if info["openssl_ia32cap"]:
+        print(f"[crypto] WARNING: OPENSSL_ia32cap={info['openssl_ia32cap']!r} is set; "
+              "AES-NI may be disabled and encryption will run in software")
@@ -1,49 +1,156 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter, methodcaller
+import threading, time
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import cache
 
 UA = "Mozilla/5.0 (compatible; EmployabilityBot/0.1)"
 HEADERS = {"User-Agent": UA}
 TIMEOUT = 15
 
-def _github(username: Optional[str]) -> Dict[str, Any]:
+# The four API calls behind a scan run concurrently (green threads under
+# gevent), over one keep-alive session so repeat scans skip the TLS handshake.
+_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="footprint")
+_session = requests.Session()
+_session.headers.update(HEADERS)
+_session.mount("https://", HTTPAdapter(
+    pool_connections=20,
+    pool_maxsize=50,
+    max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504], allowed_methods=["GET"]),
+))
+
+# Last ETag + body per URL: GitHub answers If-None-Match with 304, which
+# does not count against the unauthenticated rate limit.
+ETAG_CACHE_MAX = 512
+_etags: "OrderedDict[str, tuple]" = OrderedDict()
+_etag_lock = threading.Lock()
+
+# Profiles change on the order of hours: keep successful summaries this long
+FOOTPRINT_TTL = 3600
+# Set after GitHub answers 403 with an exhausted quota; skip GitHub until reset
+_GH_LIMITED_KEY = "fp:gh:limited"
+
+def _get_json(url: str) -> Any:
+    headers = {}
+    with _etag_lock:
+        cached = _etags.get(url)
+    if cached:
+        headers["If-None-Match"] = cached[0]
+    r = _session.get(url, headers=headers, timeout=TIMEOUT)
+    if r.status_code == 304 and cached:
+        return cached[1]
+    r.raise_for_status()
+    body = r.json()
+    etag = r.headers.get("ETag")
+    if etag:
+        with _etag_lock:
+            _etags[url] = (etag, body)
+            _etags.move_to_end(url)
+            while len(_etags) > ETAG_CACHE_MAX:
+                _etags.popitem(last=False)
+    return body
+
+def _fetch_all(urls: List[str]) -> List[Any]:
+    """GET all `urls` at once; each slot holds the JSON body or the exception."""
+    futures = [_POOL.submit(_get_json, u) for u in urls]
+    out = []
+    for f in futures:
+        try:
+            out.append(f.result())
+        except Exception as e:
+            out.append(e)
+    return out
+
+def _github_urls(username: str) -> List[str]:
+    return [
+        f"https://api.github.com/users/{username}",
+        f"https://api.github.com/users/{username}/repos?per_page=100&sort=updated",
+    ]
+
+def _github_result(username: Optional[str], bodies: List[Any]) -> Dict[str, Any]:
     if not username:
         return {"username": "", "repos": 0, "top_langs": [], "recent_activity": []}
     try:
-        r = requests.get(f"https://api.github.com/users/{username}", headers=HEADERS, timeout=TIMEOUT)
-        r.raise_for_status()
-        prof = r.json()
-        r2 = requests.get(f"https://api.github.com/users/{username}/repos?per_page=100&sort=updated", headers=HEADERS, timeout=TIMEOUT)
-        r2.raise_for_status()
-        repos = r2.json()
-        langs = {}
-        for repo in repos:
-            lang = repo.get("language")
-            if lang:
-                langs[lang] = langs.get(lang, 0) + 1
-        top_langs = sorted(langs, key=langs.get, reverse=True)[:5]
-        recent = [{"repo": repo["name"], "pushed_at": repo["pushed_at"]} for repo in repos[:5]]
+        prof, repos = bodies
+        for b in bodies:
+            if isinstance(b, Exception):
+                raise b
+        # get/filter/count all run in C; .get since "language" may be absent
+        langs = Counter(filter(None, map(methodcaller("get", "language"), repos)))
+        top_langs = [lang for lang, _ in langs.most_common(5)]
+        recent = [{"repo": name, "pushed_at": pushed} for name, pushed in map(itemgetter("name", "pushed_at"), repos[:5])]
         return {"username": username, "repos": prof.get("public_repos", len(repos)), "top_langs": top_langs, "recent_activity": recent}
     except Exception:
         return {"username": username, "repos": 0, "top_langs": [], "recent_activity": []}
 
-def _stackoverflow(user_id: Optional[int]) -> Dict[str, Any]:
+def _stackoverflow_urls(user_id: int) -> List[str]:
+    return [
+        f"https://api.stackexchange.com/2.3/users/{user_id}?site=stackoverflow",
+        f"https://api.stackexchange.com/2.3/users/{user_id}/top-tags?site=stackoverflow",
+    ]
+
+def _stackoverflow_result(user_id: Optional[int], bodies: List[Any]) -> Dict[str, Any]:
     if not user_id:
         return {"user_id": 0, "reputation": 0, "top_tags": []}
     try:
-        r = requests.get(f"https://api.stackexchange.com/2.3/users/{user_id}?site=stackoverflow", headers=HEADERS, timeout=TIMEOUT)
-        r.raise_for_status()
-        data = r.json()
+        data, top = bodies
+        for b in bodies:
+            if isinstance(b, Exception):
+                raise b
         items = data.get("items", [])
         rep = items[0]["reputation"] if items else 0
-        r2 = requests.get(f"https://api.stackexchange.com/2.3/users/{user_id}/top-tags?site=stackoverflow", headers=HEADERS, timeout=TIMEOUT)
-        r2.raise_for_status()
-        tags = [t["tag_name"] for t in r2.json().get("items", [])][:10]
+        tags = [t["tag_name"] for t in top.get("items", [])][:10]
         return {"user_id": user_id, "reputation": rep, "top_tags": tags}
     except Exception:
         return {"user_id": user_id, "reputation": 0, "top_tags": []}
 
+def _github(username: Optional[str]) -> Dict[str, Any]:
+    return _github_result(username, _fetch_all(_github_urls(username)) if username else [])
+
+def _stackoverflow(user_id: Optional[int]) -> Dict[str, Any]:
+    return _stackoverflow_result(user_id, _fetch_all(_stackoverflow_urls(user_id)) if user_id else [])
+
+def _ok(bodies: List[Any]) -> bool:
+    return bool(bodies) and not any(isinstance(b, Exception) for b in bodies)
+
+def _note_github_limit(bodies: List[Any]) -> None:
+    for b in bodies:
+        resp = getattr(b, "response", None)
+        if resp is None or resp.status_code != 403 or resp.headers.get("X-RateLimit-Remaining") != "0":
+            continue
+        try:
+            wait = int(resp.headers.get("X-RateLimit-Reset", "0")) - int(time.time())
+        except ValueError:
+            wait = 60
+        cache.set_json(_GH_LIMITED_KEY, True, ttl=max(1, min(wait, 3600)))
+        return
+
 def scan(github_username: Optional[str], stackoverflow_user_id: Optional[int]) -> Dict[str, Any]:
-    return {
-        "github": _github(github_username),
-        "stackoverflow": _stackoverflow(stackoverflow_user_id)
-    }
+    gh_key = f"fp:gh:{github_username.lower()}" if github_username else None
+    so_key = f"fp:so:{stackoverflow_user_id}" if stackoverflow_user_id else None
+    gh = cache.get_json(gh_key) if gh_key else None
+    so = cache.get_json(so_key) if so_key else None
+
+    gh_urls = []
+    if github_username and gh is None and not cache.get_json(_GH_LIMITED_KEY):
+        gh_urls = _github_urls(github_username)
+    so_urls = _stackoverflow_urls(stackoverflow_user_id) if stackoverflow_user_id and so is None else []
+    bodies = _fetch_all(gh_urls + so_urls)
+    gh_bodies, so_bodies = bodies[:len(gh_urls)], bodies[len(gh_urls):]
+
+    if gh is None:
+        gh = _github_result(github_username, gh_bodies)
+        if _ok(gh_bodies):
+            cache.set_json(gh_key, gh, ttl=FOOTPRINT_TTL)
+        else:
+            _note_github_limit(gh_bodies)
+    if so is None:
+        so = _stackoverflow_result(stackoverflow_user_id, so_bodies)
+        if _ok(so_bodies):
+            cache.set_json(so_key, so, ttl=FOOTPRINT_TTL)
+    return {"github": gh, "stackoverflow": so}
@@ -0,0 +1,12 @@
+# gunicorn.conf.py — `gunicorn -c gunicorn.conf.py app:app`
+import os
+
+# gevent workers multiplex many slow requests (LLM, job boards, Mongo) per
+# process; app.py monkey-patches the stdlib when ASYNC_MODE=gevent (default).
+worker_class = "gevent"
+worker_connections = int(os.getenv("WORKER_CONNECTIONS", "1000"))
+# Socket.IO sessions are held in-process, so keep one worker unless the
+# deployment adds sticky sessions and a Socket.IO message queue.
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+bind = os.getenv("BIND", "0.0.0.0:8000")
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
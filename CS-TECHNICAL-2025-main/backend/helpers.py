@@ -1,6 +1,22 @@
 # helpers.py
 from typing import Optional
-import time
+import functools, time
+
+import numpy as np
+
+def run_native(fn, *args):
+    """Run disk/CPU-bound work (hashing, encryption, bcrypt, HTML parsing) on a
+    native thread. Under gevent's monkey-patching that is the hub threadpool,
+    so the work doesn't stall every other greenlet in the worker; otherwise
+    the caller is already a real thread and it runs inline."""
+    try:
+        from gevent import monkey
+        if monkey.is_module_patched("threading"):
+            import gevent
+            return gevent.get_hub().threadpool.apply(fn, args)
+    except ImportError:
+        pass
+    return fn(*args)
 
 def _now() -> float:
     return time.time()
@@ -9,3 +25,20 @@ def _ema(prev: Optional[float], value: float, alpha: float) -> float:
     if prev is None:
         return value
     return alpha * value + (1 - alpha) * prev
+
+@functools.lru_cache(maxsize=256)
+def _ema_weights(alpha: float, n: int) -> np.ndarray:
+    # Weight of each of the last n samples in the EMA; clients send batches of
+    # a few fixed sizes, so the powers are computed once per (alpha, n)
+    weights = alpha * (1.0 - alpha) ** np.arange(n - 1, -1, -1)
+    weights.setflags(write=False)
+    return weights
+
+def _ema_fold(prev: Optional[float], values: np.ndarray, alpha: float) -> float:
+    """Final value of applying _ema over `values` in order, in one vectorized step."""
+    n = len(values)
+    if n == 1:
+        return _ema(prev, float(values[0]), alpha)
+    if prev is None:
+        prev, values, n = float(values[0]), values[1:], n - 1
+    return float((1.0 - alpha) ** n * prev + _ema_weights(alpha, n) @ values)
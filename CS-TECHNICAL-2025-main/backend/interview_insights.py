@@ -1,29 +1,50 @@
 # interview_insights.py
 import re
-from statistics import mean
+from math import fsum
 
-def _text_strengths(answer: str) -> list[str]:
-    """Find textual strengths inside an answer."""
-    strengths = []
-    if len(answer.split()) > 50:
+# All answer checks fused into one pattern, scanned once per answer. Each
+# alternative sits in a lookahead so nothing is consumed: every position is
+# tried against every check, exactly like the separate searches. At most one
+# check can start at any position, so no hit hides another.
+_RE_ANSWER = re.compile(
+    r"(?=(?P<team>\b(?:team|collaborat|lead|mentor)\b)"
+    r"|(?P<achieve>\b(?:achiev|deliver|impact|result|increase|reduce)\b)"
+    r"|(?P<problem>\b(?:problem|solve|debug|design)\b)"
+    r"|(?P<pronoun>\b(?:i|we)\b)"
+    r"|(?P<hedge>\bumm|uhh|maybe|sort of|kind of\b))",
+    re.I,
+)
+_FLAG_BITS = {name: 1 << n for n, name in enumerate(("team", "achieve", "problem", "pronoun", "hedge"))}
+_ALL_FLAGS = sum(_FLAG_BITS.values())
+
+def _answer_flags(answer: str) -> int:
+    flags = 0
+    for m in _RE_ANSWER.finditer(answer):
+        flags |= _FLAG_BITS[m.lastgroup]
+        if flags == _ALL_FLAGS:
+            break
+    return flags
+
+def _analyze_answer(answer: str) -> tuple[list[str], list[str]]:
+    """Textual strengths and weaknesses of one answer."""
+    flags = _answer_flags(answer)
+    n_words = len(answer.split())
+    strengths, weaknesses = [], []
+    if n_words > 50:
         strengths.append("Provides detailed, in-depth responses")
-    if re.search(r"\b(team|collaborat|lead|mentor)\b", answer, re.I):
+    if flags & _FLAG_BITS["team"]:
         strengths.append("Demonstrates teamwork or leadership")
-    if re.search(r"\b(achiev|deliver|impact|result|increase|reduce)\b", answer, re.I):
+    if flags & _FLAG_BITS["achieve"]:
         strengths.append("Highlights measurable achievements")
-    if re.search(r"\b(problem|solve|debug|design)\b", answer, re.I):
+    if flags & _FLAG_BITS["problem"]:
         strengths.append("Shows analytical and problem-solving skills")
-    return strengths
-
-def _text_weaknesses(answer: str) -> list[str]:
-    weaknesses = []
-    if len(answer.split()) < 15:
+    if n_words < 15:
         weaknesses.append("Answers are too short; may lack elaboration")
-    if not re.search(r"\b(i|we)\b", answer.lower()):
+    if not flags & _FLAG_BITS["pronoun"]:
         weaknesses.append("Lacks personal engagement or examples")
-    if re.search(r"\bumm|uhh|maybe|sort of|kind of\b", answer.lower()):
+    if flags & _FLAG_BITS["hedge"]:
         weaknesses.append("Hesitation words reduce confidence")
-    return weaknesses
+    return strengths, weaknesses
 
 def generate_insights(scores: dict, transcripts: list[str], face_summary: dict) -> dict:
     """Produce strengths/weaknesses and an overall engagement score."""
@@ -31,11 +52,13 @@ def generate_insights(scores: dict, transcripts: list[str], face_summary: dict)
 
     # --- textual content analysis ---
     for a in transcripts:
-        text_strengths += _text_strengths(a)
-        text_weaknesses += _text_weaknesses(a)
+        strengths, weaknesses = _analyze_answer(a)
+        text_strengths.extend(strengths)
+        text_weaknesses.extend(weaknesses)
 
     # --- aggregate quantitative data ---
-    avg_score = mean(scores.values()) if scores else 0.5
+    # fsum/len instead of statistics.mean, which converts every float to an exact fraction
+    avg_score = fsum(scores.values()) / len(scores) if scores else 0.5
     attn = face_summary.get("overall", {}).get("avg_attention", 0.5)
     smile = face_summary.get("overall", {}).get("smile_ratio", 0.0)
     presence = face_summary.get("overall", {}).get("presence_ratio", 0.5)
@@ -49,9 +72,8 @@ def generate_insights(scores: dict, transcripts: list[str], face_summary: dict)
         text_weaknesses.append("Shows fluctuating attention or camera avoidance")
 
     # Deduplicate while preserving order
-    def uniq(seq): seen=set(); return [x for x in seq if not (x in seen or seen.add(x))]
-    strengths = uniq(text_strengths)
-    weaknesses = uniq(text_weaknesses)
+    strengths = list(dict.fromkeys(text_strengths))
+    weaknesses = list(dict.fromkeys(text_weaknesses))
 
     summary = {
         "overall_score": overall_score,
@@ -1,3 +1,4 @@
+import re
 from typing import Dict, Any, List, Optional
 
 BASE_QUESTIONS = [
@@ -13,10 +14,15 @@ def generate_questions(parsed: Dict[str, Any], role: Optional[str]) -> List[Dict
         qs.append({"id": "q5", "text": f"What makes you a fit for {role}?", "topic": "fit"})
     return qs
 
+# One scan per keyword family instead of one substring search per keyword.
+# Metrics are matched case-sensitively, STAR words on the lowercased answer.
+_METRIC_RE = re.compile(r"%|users|ms|latency|revenue|cost")
+_STAR_RE = re.compile(r"situation|task|action|result")
+
 def score_answer(answer: str) -> float:
     base = 0.3 + 0.01 * min(50, len(answer.split()))
-    if any(x in answer for x in ["%", "users", "ms", "latency", "revenue", "cost"]):
+    if _METRIC_RE.search(answer):
         base += 0.2
-    if any(x in answer.lower() for x in ["situation", "task", "action", "result"]):
+    if _STAR_RE.search(answer.lower()):
         base += 0.2
     return round(min(1.0, base), 2)
@@ -0,0 +1,104 @@
+# jobs.py
+from __future__ import annotations
+import hashlib, json, time
+from typing import Any, Callable, Dict, Optional
+
+import cache
+from storage import DB, new_id
+
+# Finished jobs are kept this long so clients can poll /jobs/<id> for the result
+JOB_TTL_SECS = 15 * 60
+
+# With REDIS_URL set every status change is written through to Redis, so a
+# poll (or a duplicate request) that lands on another worker still finds the
+# job; DB["jobs"] holds the live copy in the worker running it.
+def _job_key(job_id: str) -> str:
+    return f"job:{job_id}"
+
+def _inflight_key(key: str) -> str:
+    return f"job:inflight:{key}"
+
+def _save(job: Dict[str, Any]) -> None:
+    cache.set_json(_job_key(job["job_id"]), job, ttl=JOB_TTL_SECS)
+
+def job_key(kind: str, owner: str, raw_text: str, extra: Optional[Dict[str, Any]] = None) -> str:
+    """Identify identical work so concurrent duplicate requests share one job."""
+    h = hashlib.sha256(raw_text.encode("utf-8", "ignore"))
+    if extra:
+        h.update(json.dumps(extra, sort_keys=True, default=str).encode("utf-8"))
+    return f"{kind}:{owner}:{h.hexdigest()}"
+
+def _prune(now: float) -> None:
+    jobs = DB.setdefault("jobs", {})
+    stale = [jid for jid, j in jobs.items()
+             if j["status"] in ("done", "error") and now - j["finished_at"] > JOB_TTL_SECS]
+    for jid in stale:
+        jobs.pop(jid, None)
+
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    if not job_id:
+        return None
+    return DB.setdefault("jobs", {}).get(job_id) or cache.get_json(_job_key(job_id))
+
+def submit(
+    kind: str,
+    key: str,
+    owner: str,
+    fn: Callable[[], Dict[str, Any]],
+    spawn: Callable[..., Any],
+    on_done: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """Run `fn` in the background via `spawn` and return the job record.
+
+    `spawn` is the server's task launcher (socketio.start_background_task), so
+    jobs run as threads or greenlets depending on the Socket.IO async mode.
+    A request whose `key` matches a job still in flight reuses that job.
+    """
+    now = time.time()
+    _prune(now)
+    jobs = DB.setdefault("jobs", {})
+    inflight = DB.setdefault("job_keys", {})
+
+    running_id = inflight.get(key)
+    if running_id and running_id in jobs:
+        return jobs[running_id]
+    running_id = cache.get_json(_inflight_key(key))
+    if running_id:
+        running = cache.get_json(_job_key(running_id))
+        if running and running["status"] in ("queued", "running"):
+            return running
+
+    job = {
+        "job_id": new_id(),
+        "kind": kind,
+        "owner": owner,
+        "status": "queued",
+        "result": None,
+        "error": None,
+        "created_at": now,
+        "finished_at": None,
+    }
+    jobs[job["job_id"]] = job
+    inflight[key] = job["job_id"]
+    _save(job)
+    cache.set_json(_inflight_key(key), job["job_id"], ttl=JOB_TTL_SECS)
+
+    def _run():
+        job["status"] = "running"
+        _save(job)
+        try:
+            job["result"] = fn()
+            job["status"] = "done"
+        except Exception as e:
+            job["error"] = str(e)
+            job["status"] = "error"
+        finally:
+            job["finished_at"] = time.time()
+            inflight.pop(key, None)
+            _save(job)
+            cache.delete(_inflight_key(key))
+        if on_done:
+            on_done(job)
+
+    spawn(_run)
+    return job
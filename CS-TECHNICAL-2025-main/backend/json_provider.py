@@ -0,0 +1,37 @@
+# json_provider.py
+from __future__ import annotations
+import decimal
+from typing import Any
+
+import orjson
+from flask.json.provider import JSONProvider
+
+# Non-string dict keys are allowed by stdlib json; keep accepting them.
+ORJSON_OPTS = orjson.OPT_NON_STR_KEYS
+
+def _default(o: Any) -> Any:
+    # orjson handles datetime/uuid/dataclasses natively; cover the rest of
+    # what Flask's DefaultJSONProvider accepts.
+    if isinstance(o, decimal.Decimal):
+        return str(o)
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    if isinstance(o, (set, frozenset)):
+        return list(o)
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+def dumps_bytes(obj: Any, option: int = 0) -> bytes:
+    return orjson.dumps(obj, default=_default, option=ORJSON_OPTS | option)
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by orjson (used by jsonify and request.get_json)."""
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return dumps_bytes(obj).decode("utf-8")
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj), mimetype="application/json")
@@ -0,0 +1,66 @@
+# llm_cache.py
+from __future__ import annotations
+import hashlib, os, re, threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+import cache
+from llm_client import LLM_MODEL, PROMPT_VERSION
+
+# Content-addressed cache for LLM results: identical resume text (modulo
+# whitespace, which differs between PDF extractors) under the same model and
+# prompt version reuses the earlier answer instead of paying seconds of LLM
+# latency again. Two tiers: a small in-process LRU and, when REDIS_URL is
+# set, Redis shared by all workers.
+#
+# There is deliberately no "similar text" tier: LLM output describes the
+# candidate, so serving it for a merely similar CV would leak one user's
+# review to another or hide the effect of a user's own edits.
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+MEM_MAX_ITEMS = 512
+
+_WS_RE = re.compile(r"\s+")
+_mem: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_lock = threading.Lock()
+
+def _key(text: str, namespace: str) -> str:
+    # Model and prompt version are part of the key: changing either misses
+    norm = _WS_RE.sub(" ", text or "").strip()
+    h = hashlib.blake2b(f"{LLM_MODEL}|{PROMPT_VERSION}|".encode("utf-8"), digest_size=16)
+    h.update(norm.encode("utf-8", "ignore"))
+    return f"llm:{namespace}:" + h.hexdigest()
+
+def get(text: str, namespace: str) -> Optional[Dict[str, Any]]:
+    key = _key(text, namespace)
+    with _lock:
+        hit = _mem.get(key)
+        if hit is not None:
+            _mem.move_to_end(key)
+            return hit
+    hit = cache.get_json(key)
+    if hit is not None:
+        _remember(key, hit)
+    return hit
+
+def set(text: str, namespace: str, value: Dict[str, Any]) -> None:
+    # Unparseable model output is returned as {"raw_response": ...}; retry those.
+    if not isinstance(value, dict) or "raw_response" in value:
+        return
+    key = _key(text, namespace)
+    _remember(key, value)
+    cache.set_json(key, value, ttl=LLM_CACHE_TTL)
+
+def cached(namespace: str, text: str, fn: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+    hit = get(text, namespace)
+    if hit is not None:
+        return hit
+    value = fn()
+    set(text, namespace, value)
+    return value
+
+def _remember(key: str, value: Dict[str, Any]) -> None:
+    with _lock:
+        _mem[key] = value
+        _mem.move_to_end(key)
+        while len(_mem) > MEM_MAX_ITEMS:
+            _mem.popitem(last=False)
@@ -1,14 +1,45 @@
 from __future__ import annotations
 import json
 import os
-from typing import Any, Dict, List
+import re
+from typing import Any, Callable, Dict, List, Optional
 
+import orjson
 from openai import OpenAI
 
 
+LLM_MODEL = os.getenv("LLM_MODEL", "meta-llama/llama-3.3-70b-instruct:free")
+# Bump whenever a prompt or schema below changes so cached answers are not reused
+PROMPT_VERSION = "2"
+
 _client: OpenAI | None = None
 
 
+def _loads(text: str) -> Any:
+    """Parse model JSON with orjson; stdlib json only for what orjson rejects (NaN, huge ints)."""
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
+        return json.loads(text)
+
+
+# First line when the reply opens with a fence (```json or ```), and the
+# last line when it closes with one
+_FENCE_OPEN_RE = re.compile(r"\A```[^\n]*\n?")
+_FENCE_CLOSE_RE = re.compile(r"(?:\A|\n)[^\n]*```\Z")
+
+
+def _strip_fences(content: str) -> str:
+    """Model reply without surrounding markdown code fences."""
+    cleaned = _FENCE_OPEN_RE.sub("", content.strip(), count=1)
+    cleaned = _FENCE_CLOSE_RE.sub("", cleaned, count=1)
+    return cleaned.strip()
+
+
+def _job_json(job: Dict[str, Any]) -> str:
+    return orjson.dumps(job, default=str).decode()
+
+
 def get_client() -> OpenAI:
     global _client
     if _client is None:
@@ -22,7 +53,95 @@ def get_client() -> OpenAI:
     return _client
 
 
-def analyze_resume_with_llm(raw_text: str) -> Dict[str, Any]:
+def _chat(client: OpenAI, system_prompt: str, user_prompt: str,
+          on_delta: Optional[Callable[[str], None]] = None) -> str:
+    """Stream one completion and return its full text ("{}" if empty).
+
+    Tokens arrive as the model produces them; `on_delta` sees each piece,
+    which is what the streaming (text/event-stream) routes forward.
+    """
+    stream = client.chat.completions.create(
+        model=LLM_MODEL,
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ],
+        stream=True,
+    )
+    parts: List[str] = []
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        piece = chunk.choices[0].delta.content
+        if piece:
+            parts.append(piece)
+            if on_delta is not None:
+                on_delta(piece)
+    return "".join(parts) or "{}"
+
+
+# JSON schemas shared by the single-purpose prompts and analyze_resume_bundle
+_ANALYSIS_SCHEMA = (
+    "{ "
+    "\"structured\": { "
+    "  \"candidate\": {\"name\": string, \"email\": string, \"phone\": string}, "
+    "  \"skills_hard\": string[], "
+    "  \"skills_soft\": string[], "
+    "  \"education\": [{\"institution\": string, \"degree\": string, \"field\": string, \"start_year\": number|null, \"end_year\": number|null, \"location\": string}], "
+    "  \"experience\": [{\"title\": string, \"company\": string, \"location\": string, \"start\": string, \"end\": string, \"bullets\": string[]}], "
+    "  \"roles\": string[], "
+    "  \"location\": string, \"region\": string "
+    "}, "
+    "\"review\": { "
+    "  \"ats_score\": number, "
+    "  \"summary\": string, "
+    "  \"strengths\": string[], "
+    "  \"weaknesses\": string[], "
+    "  \"gaps\": string[], "
+    "  \"suggestions\": string[] "
+    "}, "
+    "\"career_report\": { "
+    "  \"summary\": string, "
+    "  \"six_month_focus\": { "
+    "    \"headline\": string, "
+    "    \"themes\": string[], "
+    "    \"target_roles\": string[] "
+    "  }, "
+    "  \"target_roles\": [{\"role\": string, \"fit_score\": number, \"why\": string}], "
+    "  \"skills_to_double_down\": string[], "
+    "  \"skills_to_learn\": string[], "
+    "  \"certifications\": string[], "
+    "  \"learning_plan\": [{\"month\": number, \"focus\": string, \"actions\": string[]}], "
+    "  \"market_insights\": {\"target_regions\": string[], \"hot_skills\": string[], \"notes\": string}, "
+    "  \"interview_tips\": string[], "
+    "  \"narrative_summary\": string "
+    "} "
+    "}"
+)
+
+_REVIEW_SCHEMA = (
+    "{ "
+    "  \"overall\": { \"score\": number, \"label\": string, \"out_of\": 100 }, "
+    "  \"breakdown\": { "
+    "    \"skills_coverage\": number, "
+    "    \"structure_formatting\": number, "
+    "    \"clarity_impact\": number, "
+    "    \"regional_relevance\": number "
+    "  }, "
+    "  \"strengths\": string[], "
+    "  \"areas_for_improvement\": string[], "
+    "  \"notes\": string "
+    "}"
+)
+
+_REVIEW_RULES = (
+    "Scoring rules: all scores are integers 0–100. "
+    "Map overall.label by score: 90–100=\"Excellent\", 75–89=\"Good\", 60–74=\"Fair\", 0–59=\"Needs Improvement\". "
+    "Consider the resume's content for skills coverage, structure/formatting quality, clarity/impact of bullets, and regional relevance of experience and education. "
+)
+
+
+def analyze_resume_with_llm(raw_text: str, on_delta: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
     """Call OpenRouter LLM to analyze a resume and return structured JSON.
 
     The model is instructed to respond with a single JSON object containing:
@@ -37,41 +156,7 @@ def analyze_resume_with_llm(raw_text: str) -> Dict[str, Any]:
         "Given the raw text of a CV and optionally some interview and market context, "
         "you MUST respond with a single JSON object only, no markdown, no explanation. "
         "The JSON schema is exactly: "
-        "{ "
-        "\"structured\": { "
-        "  \"candidate\": {\"name\": string, \"email\": string, \"phone\": string}, "
-        "  \"skills_hard\": string[], "
-        "  \"skills_soft\": string[], "
-        "  \"education\": [{\"institution\": string, \"degree\": string, \"field\": string, \"start_year\": number|null, \"end_year\": number|null, \"location\": string}], "
-        "  \"experience\": [{\"title\": string, \"company\": string, \"location\": string, \"start\": string, \"end\": string, \"bullets\": string[]}], "
-        "  \"roles\": string[], "
-        "  \"location\": string, \"region\": string "
-        "}, "
-        "\"review\": { "
-        "  \"ats_score\": number, "
-        "  \"summary\": string, "
-        "  \"strengths\": string[], "
-        "  \"weaknesses\": string[], "
-        "  \"gaps\": string[], "
-        "  \"suggestions\": string[] "
-        "}, "
-        "\"career_report\": { "
-        "  \"summary\": string, "
-        "  \"six_month_focus\": { "
-        "    \"headline\": string, "
-        "    \"themes\": string[], "
-        "    \"target_roles\": string[] "
-        "  }, "
-        "  \"target_roles\": [{\"role\": string, \"fit_score\": number, \"why\": string}], "
-        "  \"skills_to_double_down\": string[], "
-        "  \"skills_to_learn\": string[], "
-        "  \"certifications\": string[], "
-        "  \"learning_plan\": [{\"month\": number, \"focus\": string, \"actions\": string[]}], "
-        "  \"market_insights\": {\"target_regions\": string[], \"hot_skills\": string[], \"notes\": string}, "
-        "  \"interview_tips\": string[], "
-        "  \"narrative_summary\": string "
-        "} "
-        "}. "
+        + _ANALYSIS_SCHEMA + ". "
         "Return ONLY this JSON, nothing else."
     )
 
@@ -85,32 +170,14 @@ def analyze_resume_with_llm(raw_text: str) -> Dict[str, Any]:
 
     print(f"[llm_client] Calling LLM, raw_text length={len(raw_text)}")
 
-    completion = client.chat.completions.create(
-        model="meta-llama/llama-3.3-70b-instruct:free",
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ],
-    )
-
-    content = completion.choices[0].message.content or "{}"
-    print(f"[llm_client] Raw LLM response snippet: {content[:200]}...")
+    content = _chat(client, system_prompt, user_prompt, on_delta)
 
     # Clean up markdown code fences if present
-    cleaned = content.strip()
-    if cleaned.startswith("```"):
-        lines = cleaned.splitlines()
-        # Remove first fence line (```json or ```)
-        cleaned = "\n".join(lines[1:])
-    if cleaned.endswith("```"):
-        lines = cleaned.splitlines()
-        cleaned = "\n".join(lines[:-1])
-    cleaned = cleaned.strip()
+    cleaned = _strip_fences(content)
 
     # Try direct JSON parse first
     try:
-        data = json.loads(cleaned)
-        print(f"[llm_client] Successfully parsed JSON with keys: {list(data.keys())}")
+        data = _loads(cleaned)
         return data
     except Exception as e:
         print(f"[llm_client] JSON parse failed (first attempt): {e}")
@@ -120,7 +187,7 @@ def analyze_resume_with_llm(raw_text: str) -> Dict[str, Any]:
     if last_brace != -1:
         candidate = cleaned[: last_brace + 1].strip()
         try:
-            data = json.loads(candidate)
+            data = _loads(candidate)
             print("[llm_client] Parsed JSON after trimming trailing text.")
             return data
         except Exception as e2:
@@ -130,7 +197,7 @@ def analyze_resume_with_llm(raw_text: str) -> Dict[str, Any]:
     return {"raw_response": content}
 
 
-def analyze_resume_review_llm(raw_text: str) -> Dict[str, Any]:
+def analyze_resume_review_llm(raw_text: str, on_delta: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
     """Call OpenRouter LLM to produce a resume review with detailed scoring.
 
     Expected JSON schema:
@@ -152,22 +219,9 @@ def analyze_resume_review_llm(raw_text: str) -> Dict[str, Any]:
     system_prompt = (
         "You are an ATS and resume review expert. "
         "Given a resume's raw text, return ONLY a single JSON object that follows this exact schema: "
-        "{ "
-        "  \"overall\": { \"score\": number, \"label\": string, \"out_of\": 100 }, "
-        "  \"breakdown\": { "
-        "    \"skills_coverage\": number, "
-        "    \"structure_formatting\": number, "
-        "    \"clarity_impact\": number, "
-        "    \"regional_relevance\": number "
-        "  }, "
-        "  \"strengths\": string[], "
-        "  \"areas_for_improvement\": string[], "
-        "  \"notes\": string "
-        "}. "
-        "Scoring rules: all scores are integers 0–100. "
-        "Map overall.label by score: 90–100=\"Excellent\", 75–89=\"Good\", 60–74=\"Fair\", 0–59=\"Needs Improvement\". "
-        "Consider the resume's content for skills coverage, structure/formatting quality, clarity/impact of bullets, and regional relevance of experience and education. "
-        "Return ONLY valid JSON, no extra text."
+        + _REVIEW_SCHEMA + ". "
+        + _REVIEW_RULES
+        + "Return ONLY valid JSON, no extra text."
     )
 
     user_prompt = (
@@ -175,33 +229,60 @@ def analyze_resume_review_llm(raw_text: str) -> Dict[str, Any]:
     )
 
     print(f"[llm_client] Calling LLM for review, raw_text length={len(raw_text)}")
-    completion = client.chat.completions.create(
-        model="meta-llama/llama-3.3-70b-instruct:free",
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ],
-    )
-    content = completion.choices[0].message.content or "{}"
-    print(f"[llm_client] Review LLM response snippet: {content[:200]}...")
+    content = _chat(client, system_prompt, user_prompt, on_delta)
 
     # Some models wrap JSON in markdown fences like ```json ... ```; strip them.
-    cleaned = content.strip()
-    if cleaned.startswith("```"):
-        # remove first fence line
-        cleaned = "\n".join(cleaned.splitlines()[1:])
-    if cleaned.endswith("```"):
-        cleaned = "\n".join(cleaned.splitlines()[:-1])
-    cleaned = cleaned.strip()
+    cleaned = _strip_fences(content)
 
     try:
-        data = json.loads(cleaned)
+        data = _loads(cleaned)
     except Exception:
         data = {"raw_response": content}
     return data
 
 
-def refine_resume_for_job_llm(raw_text: str, job: Dict[str, Any]) -> Dict[str, Any]:
+def analyze_resume_bundle(raw_text: str, on_delta: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+    """Produce the career analysis and the scored review in one LLM call.
+
+    Returns {"analysis": <analyze_resume_with_llm schema>,
+             "review": <analyze_resume_review_llm schema>}; a part that is
+    missing or malformed is simply absent, and callers fall back to the
+    single-purpose function for it. The resume is sent (and prefilled) once.
+    """
+    client = get_client()
+
+    system_prompt = (
+        "You are a career coach, ATS and resume review expert. "
+        "Given the raw text of a CV, you MUST respond with a single JSON object only, no markdown, no explanation. "
+        "The JSON has exactly two keys: "
+        "{ \"analysis\": ANALYSIS, \"review\": REVIEW }. "
+        "ANALYSIS follows this schema exactly: " + _ANALYSIS_SCHEMA + ". "
+        "REVIEW follows this schema exactly: " + _REVIEW_SCHEMA + ". "
+        "For REVIEW: " + _REVIEW_RULES +
+        "Return ONLY this JSON, nothing else."
+    )
+
+    user_prompt = (
+        "Here is the raw text of a candidate resume. Review and score it (REVIEW), and "
+        "help the candidate plan the next 6 months (ANALYSIS): "
+        "which roles they should aim for, which skills to deepen, which new tools to learn, "
+        "and which certifications or projects would strengthen their profile in MENA/SSA-friendly tech markets. "
+        "Focus on realistic, concrete steps, not generic advice.\n\n" + raw_text
+    )
+
+    print(f"[llm_client] Calling LLM for analysis+review, raw_text length={len(raw_text)}")
+    content = _chat(client, system_prompt, user_prompt, on_delta)
+    cleaned = _strip_fences(content)
+    try:
+        data = _loads(cleaned)
+    except Exception:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    return {k: data[k] for k in ("analysis", "review") if isinstance(data.get(k), dict) and data[k]}
+
+
+def refine_resume_for_job_llm(raw_text: str, job: Dict[str, Any], on_delta: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
     """Given a resume's raw_text and a job object, return tailored resume guidance.
 
     Returns JSON:
@@ -230,31 +311,19 @@ def refine_resume_for_job_llm(raw_text: str, job: Dict[str, Any]) -> Dict[str, A
 
     user_prompt = (
         "Resume (raw text):\n" + raw_text + "\n\n" +
-        "Target job JSON (title, company, tags, snippet):\n" + json.dumps(job) + "\n\n" +
+        "Target job JSON (title, company, tags, snippet):\n" + _job_json(job) + "\n\n" +
         "Return ONLY valid JSON per schema."
     )
 
-    completion = client.chat.completions.create(
-        model="meta-llama/llama-3.3-70b-instruct:free",
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ],
-    )
-    content = completion.choices[0].message.content or "{}"
-    cleaned = content.strip()
-    if cleaned.startswith("```"):
-        cleaned = "\n".join(cleaned.splitlines()[1:])
-    if cleaned.endswith("```"):
-        cleaned = "\n".join(cleaned.splitlines()[:-1])
-    cleaned = cleaned.strip()
+    content = _chat(client, system_prompt, user_prompt, on_delta)
+    cleaned = _strip_fences(content)
     try:
-        return json.loads(cleaned)
+        return _loads(cleaned)
     except Exception:
         return {"raw_response": content}
 
 
-def generate_cover_letter_llm(raw_text: str, job: Dict[str, Any]) -> Dict[str, Any]:
+def generate_cover_letter_llm(raw_text: str, job: Dict[str, Any], on_delta: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
     """Generate a concise, personalized cover letter for the target job.
 
     Returns JSON: { "cover_letter": string }
@@ -268,24 +337,12 @@ def generate_cover_letter_llm(raw_text: str, job: Dict[str, Any]) -> Dict[str, A
     )
     user_prompt = (
         "Resume (raw text):\n" + raw_text + "\n\n" +
-        "Target job JSON (title, company, tags, snippet):\n" + json.dumps(job)
+        "Target job JSON (title, company, tags, snippet):\n" + _job_json(job)
     )
 
-    completion = client.chat.completions.create(
-        model="meta-llama/llama-3.3-70b-instruct:free",
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ],
-    )
-    content = completion.choices[0].message.content or "{}"
-    cleaned = content.strip()
-    if cleaned.startswith("```"):
-        cleaned = "\n".join(cleaned.splitlines()[1:])
-    if cleaned.endswith("```"):
-        cleaned = "\n".join(cleaned.splitlines()[:-1])
-    cleaned = cleaned.strip()
+    content = _chat(client, system_prompt, user_prompt, on_delta)
+    cleaned = _strip_fences(content)
     try:
-        return json.loads(cleaned)
+        return _loads(cleaned)
     except Exception:
         return {"raw_response": content}
@@ -1,17 +1,28 @@
-from typing import List, Dict, Any, Optional, Iterable, Set
+import functools, hashlib, heapq, itertools, os, re, sys, threading, time
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Iterable, Set, FrozenSet, Callable, NamedTuple, Tuple
+
+import numpy as np
+
+import cache
 from sources.noauth_jobs import all_sources
 
+try:  # pyahocorasick: optional multi-pattern substring search in C
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
 # ---------------------------------------------
 # Regional filters (MENA and Sub-Saharan Africa)
 # ---------------------------------------------
-MENA_COUNTRIES = {
+MENA_COUNTRIES = frozenset({
     "algeria", "bahrain", "djibouti", "egypt", "iran", "iraq", "israel",
     "jordan", "kuwait", "lebanon", "libya", "mauritania", "morocco", "oman",
     "palestine", "qatar", "saudi arabia", "ksa", "syria", "tunisia",
     "united arab emirates", "uae", "yemen", "sudan", "western sahara"
-}
+})
 
-SSA_COUNTRIES = {
+SSA_COUNTRIES = frozenset({
     "angola", "benin", "botswana", "burkina faso", "burundi", "cabo verde",
     "cameroon", "central african republic", "car", "chad", "comoros",
     "congo", "republic of the congo", "dr congo", "democratic republic of the congo",
@@ -22,14 +33,58 @@ SSA_COUNTRIES = {
     "sao tome", "sao tome and principe", "senegal", "seychelles", "sierra leone",
     "somalia", "south africa", "south sudan", "tanzania", "togo", "uganda",
     "zambia", "zimbabwe"
-}
+})
 
 REGION_KEYWORDS = {
-    "mena": {"mena", "middle east", "north africa"} | MENA_COUNTRIES,
-    "ssa": {"ssa", "sub-saharan africa", "sub saharan africa"} | SSA_COUNTRIES,
+    "mena": MENA_COUNTRIES | {"mena", "middle east", "north africa"},
+    "ssa": SSA_COUNTRIES | {"ssa", "sub-saharan africa", "sub saharan africa"},
 }
+_EMPTY: FrozenSet[str] = frozenset()
+
+def _keyword_matcher(keywords: Iterable[str]) -> Callable[[str], bool]:
+    """Predicate telling whether a text contains any of `keywords` as a substring.
+
+    All keywords are found in one pass over the text: an Aho-Corasick
+    automaton with pyahocorasick installed, else one compiled alternation.
+    Matchers are memoized per keyword set, so repeated searches with the
+    same skills/roles/countries reuse the compiled automaton.
+    """
+    return _compiled_matcher(frozenset(keywords))
+
+@functools.lru_cache(maxsize=256)
+def _compiled_matcher(keys: FrozenSet[str]) -> Callable[[str], bool]:
+    if "" in keys:  # "" is in every string
+        return lambda hay: True
+    if not keys:
+        return lambda hay: False
+    if ahocorasick is None:
+        pattern = re.compile("|".join(map(re.escape, sorted(keys, key=len, reverse=True))))
+        return lambda hay: pattern.search(hay) is not None
+    auto = ahocorasick.Automaton()
+    for k in keys:
+        auto.add_word(k, k)
+    auto.make_automaton()
+    return lambda hay: next(auto.iter(hay), None) is not None
+
+# Jobs whose location names one of these are dropped from MENA/SSA results
+# (US/EU and Asia/Americas labels, to avoid non-local fallbacks)
+NON_LOCAL_LOCATION_TOKENS = frozenset({
+    " usa", " united states", " us-", "california", "new york",
+    "canada", "germany", "sweden", "latam", "latin america",
+    "switzerland", " uk", " united kingdom", "australia",
+    "netherlands", "france", "spain",
+    "asia", "apac", "india", "singapore", "china", "japan", "korea",
+    "americas", "north america", "south america"
+})
+
+_REGION_MATCHERS = {key: _keyword_matcher(kws) for key, kws in REGION_KEYWORDS.items()}
+_NON_LOCAL_MATCHER = _keyword_matcher(NON_LOCAL_LOCATION_TOKENS)
+_NO_MATCH: Callable[[str], bool] = lambda hay: False
 
 def _lc(s: Optional[str]) -> str:
+    # No isascii() gate needed: CPython's str.lower() already lowers pure-ASCII
+    # strings with a table lookup and only takes the Unicode case-mapping
+    # path for non-ASCII text, where a translate() shortcut would be wrong.
     return (s or "").strip().lower()
 
 def _normalize_region(region: Optional[str]) -> Optional[str]:
@@ -57,77 +112,102 @@ def _normalize_mode(mode: Optional[str]) -> str:
         return "onsite"
     return "any"
 
-def _is_remote(job: Dict[str, Any]) -> bool:
-    loc = _lc(job.get("location"))
-    tags = { _lc(t) for t in (job.get("tags") or []) }
-    text = " ".join([_lc(job.get("title")), _lc(job.get("company")), loc, _lc(job.get("snippet"))])
-    return ("remote" in loc) or ("remote" in text) or ("remote" in tags)
+class _JobText(NamedTuple):
+    """Lower-cased job fields, computed once per job per ranking (_job_text)."""
+    title: str              # title.lower(), not stripped
+    company: str
+    location: str
+    snippet: str
+    tags: Tuple[str, ...]   # tag.lower() for each tag, in order, not stripped
+    remote: bool
+    geo: str                # location, title, tags, snippet: see _job_text
+    tag_set: FrozenSet[str] # interned tags, matched against the interned skills
+
+def _job_text(job: Dict[str, Any]) -> _JobText:
+    title = (job.get("title") or "").lower()
+    company, location, snippet = _lc(job.get("company")), _lc(job.get("location")), _lc(job.get("snippet"))
+    tags = tuple((t or "").lower() for t in (job.get("tags") or []))
+    # Text searched for region/country keywords, built once per job and shared
+    # by the filter and the scoring pass. Newlines separate the fields so a
+    # keyword only matches inside one field, never across two of them.
+    geo = "\n".join([location, title, *tags, snippet])
+    # Interned: a tag equal to a skill is then usually the same object, so set
+    # lookups settle on identity instead of comparing characters
+    tag_set = frozenset(map(sys.intern, tags))
+    return _JobText(title, company, location, snippet, tags, _is_remote(title, company, location, snippet, tags), geo, tag_set)
+
+def _is_remote(title: str, company: str, loc: str, snippet: str, tags: Tuple[str, ...]) -> bool:
+    # Cheapest, most telling fields first; stops at the first hit without
+    # joining the fields or building a tag set ("remote" contains no space,
+    # so it can only ever match inside a single field)
+    return ("remote" in loc or "remote" in title or "remote" in company
+            or "remote" in snippet or any(t.strip() == "remote" for t in tags))
 
-def _tokenize_tags_from_title(title: str) -> Set[str]:
+_TITLE_TOKEN_RE = re.compile(r"[a-zA-Z0-9+.#-]+")
+# common normalizations
+_TAG_ALIASES = {
+    "py": "python", "python3": "python",
+    "js": "javascript", "node.js": "nodejs", "node": "nodejs",
+    "ts": "typescript", "tf": "tensorflow", "tfjs": "tensorflow",
+    "postgres": "postgresql", "fast api": "fastapi", "fast-api": "fastapi",
+}
+
+# Titles repeat across sources and between scoring and explanations
+@functools.lru_cache(maxsize=4096)
+def _tokenize_tags_from_title(title: str) -> FrozenSet[str]:
     # Very light tokenization from title to help when tags are sparse
-    import re
-    toks = set(re.findall(r"[a-zA-Z0-9+.#-]+", title.lower()))
-    # common normalizations
-    alias = {
-        "py": "python", "python3": "python",
-        "js": "javascript", "node.js": "nodejs", "node": "nodejs",
-        "ts": "typescript", "tf": "tensorflow", "tfjs": "tensorflow",
-        "postgres": "postgresql", "fast api": "fastapi", "fast-api": "fastapi",
-    }
-    return { alias.get(t, t) for t in toks }
+    toks = set(_TITLE_TOKEN_RE.findall(title.lower()))
+    return frozenset(_TAG_ALIASES.get(t, t) for t in toks)
 
-def _region_country_filter(
-    jobs: List[Dict[str, Any]],
-    region: Optional[str] = None,
-    countries: Optional[List[str]] = None,
-    mode: str = "any",  # "remote" | "onsite" | "any"
-) -> List[Dict[str, Any]]:
+def _geo_filter(
+    region: Optional[str],
+    countries: Optional[List[str]],
+    mode_n: str,  # "remote" | "onsite" | "any", from _normalize_mode
+    region_key: Optional[str],  # _normalize_region(region)
+    country_tokens: Set[str],  # lower-cased, stripped non-empty countries
+) -> Optional[Callable[[_JobText], bool]]:
+    """Region/country + remote predicate for a job, or None to keep every job."""
     # If truly no geo preference and mode is any, skip filtering
-    if region is None and not countries and mode == "any":
-        return jobs
+    if region is None and not countries and mode_n == "any":
+        return None
 
-    region_key = _normalize_region(region)
-    region_set = REGION_KEYWORDS.get(region_key or "", set())
+    region_set = REGION_KEYWORDS.get(region_key or "", _EMPTY)
 
-    custom_country_set = { _lc(c) for c in (countries or []) if c }
+    custom_country_set = set(country_tokens)
 
     # If user gave a region string that we don't map (e.g. "Tunisia"),
     # treat it as a direct substring filter rather than silently dropping it.
     if region and not region_key:
         custom_country_set.add(_lc(region))
 
-    targets: Set[str] = region_set | custom_country_set
-
-    def matches_geo(j: Dict[str, Any]) -> bool:
-        # If user explicitly gave region/countries but we somehow ended up with
-        # no targets, be strict and reject rather than include everything.
-        if not targets:
-            return False
-        hay = " ".join([
-            _lc(j.get("location")),
-            _lc(j.get("title")),
-            _lc(j.get("snippet")),
-            " ".join(_lc(t) for t in (j.get("tags") or [])),
-        ])
-        return any(k in hay for k in targets)
-
-    out: List[Dict[str, Any]] = []
-    mode_n = _normalize_mode(mode)
-    for j in jobs:
-        remote = _is_remote(j)
-        geo_ok = matches_geo(j)
-
-        if mode_n == "remote":
-            if remote and geo_ok:
-                out.append(j)
-        elif mode_n == "onsite":
-            if geo_ok and not remote:
-                out.append(j)
-        else:  # "any"
-            if geo_ok:
-                out.append(j)
-
-    return out
+    if custom_country_set:
+        hits_target = _keyword_matcher(region_set | custom_country_set)
+    elif region_set:
+        # Region alone: its matcher was compiled at import
+        hits_target = _REGION_MATCHERS[region_key]
+    else:
+        # If user explicitly gave region/countries but we somehow ended up
+        # with no targets, be strict and reject rather than include everything.
+        return lambda jt: False
+
+    if mode_n == "remote":
+        return lambda jt: jt.remote and hits_target(jt.geo)
+    if mode_n == "onsite":
+        return lambda jt: not jt.remote and hits_target(jt.geo)
+    return lambda jt: hits_target(jt.geo)
+
+def _region_country_filter(
+    jobs: List[Tuple[Dict[str, Any], _JobText]],
+    region: Optional[str],
+    countries: Optional[List[str]],
+    mode_n: str,
+    region_key: Optional[str],
+    country_tokens: Set[str],
+) -> List[Tuple[Dict[str, Any], _JobText]]:
+    keep = _geo_filter(region, countries, mode_n, region_key, country_tokens)
+    if keep is None:
+        return jobs
+    return [(j, jt) for j, jt in jobs if keep(jt)]
 
 # Curated fallback jobs to ensure a diversified list when scraping is limited
 FALLBACK_JOBS = [
@@ -153,10 +233,9 @@ FALLBACK_JOBS = [
     {"title":"Backend Engineer (Java/Spring)","company":"EnterpriseSoft","location":"US","url":"https://jobs.example.com/enterprisesoft-java","source":"Curated","tags":["java","spring","microservices","kafka"]}
 ]
 
+# The curated jobs never change: lower-case them once, at import
+_FALLBACK_ENTRIES = [(j, _job_text(j)) for j in FALLBACK_JOBS]
 
-def _jaccard(a: set, b: set) -> float:
-    if not a or not b: return 0.0
-    return len(a & b) / len(a | b)
 
 def _build_explanation(
     resume_skills: Set[str],
@@ -168,14 +247,16 @@ def _build_explanation(
     country_hit: bool
 ) -> Dict[str, Any]:
     overlap = resume_skills & job_tags
-    missing = [t for t in job_tags if t not in resume_skills]
+    missing = job_tags - resume_skills
+    # Only the first few names are shown, so take them off a heap, not a full sort
+    top_overlap = heapq.nsmallest(8, overlap)
     coverage = 0.0 if not job_tags else (len(overlap) / max(1, len(job_tags)))
     percent = int(round(coverage * 100))
-    strength = f"Strong match: your {', '.join(sorted(list(overlap))[:4])} experience fits {percent}% of required skills." if percent >= 60 else \
+    strength = f"Strong match: your {', '.join(top_overlap[:4])} experience fits {percent}% of required skills." if percent >= 60 else \
                f"Partial match: about {percent}% of listed skills align."
     gap = None
     if missing:
-        gap = "Gap: needs " + ", ".join(sorted(missing)[:4]) + " which you don’t mention."
+        gap = "Gap: needs " + ", ".join(heapq.nsmallest(4, missing)) + " which you don’t mention."
     fairness = "Matching ignores name, gender, photo, and age — only skills, roles, and experience are used."
     notes = []
     if mode == "remote" and remote:
@@ -186,13 +267,91 @@ def _build_explanation(
         notes.append(f"Location matches {region} preference.")
     return {
         "summary": strength,
-        "gaps": missing[:8],
+        "gaps": list(itertools.islice(missing, 8)),
         "fairness": fairness,
         "notes": notes,
-        "matched_skills": sorted(list(overlap))[:8],
-        "title_tokens": list(_tokenize_tags_from_title(title))[:10],
+        "matched_skills": top_overlap,
+        "title_tokens": list(itertools.islice(_tokenize_tags_from_title(title), 10)),
     }
 
+def _top_order(key: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k smallest keys, ascending, ties kept in input order.
+
+    Same result as np.argsort(key, kind="stable")[:k], but only the jobs that
+    can reach the top k are sorted: argpartition finds the k-th key in
+    linear time, and everything tied with it comes along.
+    """
+    if len(key) <= k:
+        return np.argsort(key, kind="stable")
+    kth = np.partition(key, k - 1)[k - 1]
+    cand = np.flatnonzero(key <= kth)
+    return cand[np.argsort(key[cand], kind="stable")][:k]
+
+def _score_jobs(
+    n_shared: np.ndarray,
+    n_tags: np.ndarray,
+    n_skills: int,
+    title_hit: np.ndarray,
+    role_hit: np.ndarray,
+    region_hit: np.ndarray,
+    remote_ok: np.ndarray,
+) -> np.ndarray:
+    """Match score per job (before rounding), computed in one buffer.
+
+    0.56 * Jaccard(skills, tags) plus the title/role/region/work-mode
+    bonuses, capped at 1.0. Every step writes into the same array, and the
+    terms are added in the same order as the scalar formula.
+    """
+    score = np.zeros(len(n_tags))
+    if n_skills:
+        # Jaccard(skills, tags), 0.0 when the job has no tags
+        np.divide(n_shared, n_skills + n_tags - n_shared, out=score, where=n_tags > 0)
+    score *= 0.56
+    np.add(score, 0.18, out=score, where=title_hit)
+    np.add(score, 0.18, out=score, where=role_hit)
+    np.add(score, 0.14, out=score, where=region_hit)
+    np.add(score, 0.12, out=score, where=remote_ok)
+    return np.minimum(score, 1.0, out=score)
+
+# Scraped jobs per skill set: repeated /match calls for the same resume (or
+# the same skills) reuse the last scrape for a few minutes instead of hitting
+# four job boards again. Shared through Redis when REDIS_URL is set.
+SOURCES_CACHE_TTL = int(os.getenv("SOURCES_CACHE_TTL", "300"))
+# A scrape with a source missing (timed out or failed) is kept only this long,
+# so one slow board isn't hidden from every search for the full TTL.
+SOURCES_PARTIAL_TTL = int(os.getenv("SOURCES_PARTIAL_TTL", "30"))
+SOURCES_MEM_MAX = 128
+_sources_mem: "OrderedDict[Tuple[str, ...], Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+_sources_lock = threading.Lock()
+
+def _scraped_jobs(skills: List[str]) -> List[Dict[str, Any]]:
+    """all_sources() for these skills, cached by their lower-cased, sorted set."""
+    key = tuple(sorted({s.strip().lower() for s in skills if s and s.strip()}))
+    now = time.monotonic()
+    with _sources_lock:
+        hit = _sources_mem.get(key)
+        if hit is not None and hit[0] > now:
+            _sources_mem.move_to_end(key)
+            return list(hit[1])
+    redis_key = "jobs:sources:" + hashlib.blake2b("\0".join(key).encode("utf-8"), digest_size=16).hexdigest()
+    jobs = cache.get_json(redis_key)
+    if jobs is None:
+        jobs, partial = all_sources(list(key))
+        if not jobs:  # every source failed or timed out: retry next time
+            return jobs
+        ttl = SOURCES_PARTIAL_TTL if partial else SOURCES_CACHE_TTL
+        cache.set_json(redis_key, jobs, ttl=ttl)
+    else:
+        # How much of its Redis TTL is left is unknown (it may be partial):
+        # hold it locally only briefly and re-read Redis after that.
+        ttl = SOURCES_PARTIAL_TTL
+    with _sources_lock:
+        _sources_mem[key] = (now + ttl, jobs)
+        _sources_mem.move_to_end(key)
+        while len(_sources_mem) > SOURCES_MEM_MAX:
+            _sources_mem.popitem(last=False)
+    return list(jobs)
+
 def rank_jobs(
     skills: List[str],
     region: Optional[str],
@@ -203,76 +362,95 @@ def rank_jobs(
 ) -> List[Dict[str, Any]]:
     # Fetch diversified set of jobs (implementation inside all_sources),
     # then score them against the candidate profile.
-    jobs = all_sources(skills or [])
+    jobs = _scraped_jobs(skills or [])
+    # Lower-case every field once; filtering and scoring both read the result
+    entries = [(j, _job_text(j)) for j in jobs]
     # If scraping fails or returns too few, pad with curated fallback
     if len(jobs) < 30:
-        jobs = jobs + FALLBACK_JOBS
+        entries += _FALLBACK_ENTRIES
 
-    # Normalize mode, then apply region/country + remote filter
+    # Normalize the preferences once; the filter and the scoring share them
     mode_n = _normalize_mode(mode)
-    jobs = _region_country_filter(jobs, region=region, countries=countries, mode=mode_n)
+    region_key = _normalize_region(region)
+    country_tokens = { _lc(c) for c in (countries or []) if c }
 
+    # Region/country + remote filter, applied inside the feature pass below
+    keep = _geo_filter(region, countries, mode_n, region_key, country_tokens)
     # If user requested MENA/SSA, drop any leftover jobs whose location
     # is explicitly tagged as US/EU to avoid non-local fallbacks.
-    region_key = _normalize_region(region)
-    if region_key in {"mena", "ssa"}:
-        bad_tokens = {
-            " usa", " united states", " us-", "california", "new york",
-            "canada", "germany", "sweden", "latam", "latin america",
-            "switzerland", " uk", " united kingdom", "australia",
-            "netherlands", "france", "spain",
-            # Explicitly filter Asia/Americas labels for MENA/SSA focus
-            "asia", "apac", "india", "singapore", "china", "japan", "korea",
-            "americas", "north america", "south america"
-        }
-        cleaned = []
-        for j in jobs:
-            loc = _lc(j.get("location"))
-            if any(tok in loc for tok in bad_tokens):
-                continue
-            cleaned.append(j)
-        jobs = cleaned
-
-    sset = {s.lower() for s in (skills or [])}
+    drop_non_local = region_key in {"mena", "ssa"}
+
+    sset = frozenset(sys.intern(s.lower()) for s in (skills or []))
     roles = [r.lower() for r in (roles or [])]
+    region_hits = _REGION_MATCHERS.get(_lc(region), _NO_MATCH)
+    country_hits = _keyword_matcher(country_tokens)
+    skill_in_title = _keyword_matcher(sset)
+    role_in_title = _keyword_matcher(roles)
+
+    # One pass filters the jobs and collects features of the survivors
+    # column-wise; scoring, ordering and the top-40 cut are then array
+    # operations, and only the jobs returned get the (comparatively costly)
+    # explanation and result dict.
+    n = len(entries)
+    kept: List[Tuple[Dict[str, Any], _JobText]] = []
+    job_tags: List[FrozenSet[str]] = []
+    n_tags = np.empty(n, dtype=np.int64)
+    n_shared = np.empty(n, dtype=np.int64)
+    title_hit = np.empty(n, dtype=bool)
+    role_hit = np.empty(n, dtype=bool)
+    region_hit = np.empty(n, dtype=bool)
+    country_hit = np.empty(n, dtype=bool)
+    remote = np.empty(n, dtype=bool)
+    for j, jt in entries:
+        if keep is not None and not keep(jt):
+            continue
+        if drop_non_local and _NON_LOCAL_MATCHER(jt.location):
+            continue
+        i = len(kept)
+        kept.append((j, jt))
+        title_l = jt.title
+        tags = jt.tag_set or _tokenize_tags_from_title(title_l)
+        job_tags.append(tags)
+
+        remote[i] = jt.remote
+        region_hit[i] = bool(region) and region_hits(jt.geo)
+        country_hit[i] = bool(country_tokens) and country_hits(jt.geo)
+        n_tags[i] = len(tags)
+        # Most jobs share no tag with the skills: isdisjoint answers that
+        # without building the intersection set
+        n_shared[i] = 0 if tags.isdisjoint(sset) else len(tags & sset)
+        title_hit[i] = skill_in_title(title_l)
+        role_hit[i] = role_in_title(title_l)
+
+    n = len(kept)
+    n_tags, n_shared, title_hit, role_hit = n_tags[:n], n_shared[:n], title_hit[:n], role_hit[:n]
+    region_hit, country_hit, remote = region_hit[:n], country_hit[:n], remote[:n]
+
+    if mode_n == "remote":
+        remote_ok = remote
+    elif mode_n == "onsite":
+        remote_ok = ~remote
+    else:
+        remote_ok = np.zeros(n, dtype=bool)
+    score = _score_jobs(n_shared, n_tags, len(sset), title_hit, role_hit, region_hit, remote_ok)
+    score = [round(x, 2) for x in score.tolist()]
+    # Geographical priority: prefer exact country > region > others
+    geo_priority = np.where(country_hit, 0, np.where(region_hit, 1, 2))
+
     ranked = []
-    country_tokens = { _lc(c) for c in (countries or []) if c }
-    for j in jobs:
-        title = j["title"]
-        title_l = title.lower()
-        tags = {t.lower() for t in j.get("tags", [])}
-        if not tags:
-            tags = _tokenize_tags_from_title(title)
-
-        remote = _is_remote(j)
-        loc_text = _lc(j.get("location"))
-        hay = " ".join([loc_text, _lc(j.get("snippet")), title_l, " ".join(tags)])
-        region_hit = bool(region) and any(k in hay for k in REGION_KEYWORDS.get(_lc(region), set()))
-        country_hit = bool(country_tokens) and any(k in hay for k in country_tokens)
-
-        # Geographical priority: prefer exact country > region > others
-        geo_priority = 0 if country_hit else (1 if region_hit else 2)
-
-        # Scoring with preference bonuses
-        jacc = _jaccard(sset, tags)
-        title_bonus = 0.18 if any(s in title_l for s in sset) else 0.0
-        role_bonus = 0.18 if any(r in title_l for r in roles) else 0.0
-        loc_bonus = 0.14 if region_hit else 0.0
-        remote_bonus = 0.12 if (mode_n == "remote" and remote) or (mode_n == "onsite" and not remote) else 0.0
-        score = 0.56 * jacc + title_bonus + role_bonus + loc_bonus + remote_bonus
-
-        j2 = dict(j)
-        j2["score"] = round(min(1.0, score), 2)
-        j2["explanation"] = _build_explanation(sset, set(tags), title, region, mode, remote, country_hit)
-        j2["remote"] = remote
-        j2["region_match"] = region_hit
-        j2["country_match"] = country_hit
-        j2["geo_priority"] = geo_priority
+    # Stable order by (geo_priority, -score); return top ~40 diverse, scored
+    # jobs. Scores are in [0, 1] with two decimals, so both fit one int key.
+    key = geo_priority * 1000 - np.rint(np.asarray(score) * 100).astype(np.int64)
+    for i in _top_order(key, 40).tolist():
+        j2 = dict(kept[i][0])
+        j2["score"] = score[i]
+        j2["explanation"] = _build_explanation(sset, job_tags[i], kept[i][1].title, region, mode, bool(remote[i]), bool(country_hit[i]))
+        j2["remote"] = bool(remote[i])
+        j2["region_match"] = bool(region_hit[i])
+        j2["country_match"] = bool(country_hit[i])
+        j2["geo_priority"] = int(geo_priority[i])
         ranked.append(j2)
-
-    ranked.sort(key=lambda x: (x.get("geo_priority", 2), -x["score"]))
-    # Return top ~40 diverse, scored jobs
-    return ranked[:40]
+    return ranked
 
 def rank_from_resume(parsed: Dict[str, Any]) -> List[Dict[str, Any]]:
     skills = parsed.get("skills", {}).get("hard", []) or []
@@ -3,38 +3,61 @@ import time
 from helpers import _now, _ema 
 
 
-def _ensure_face_state(sess: dict):
-    if "face" not in sess:
-        sess["face"] = {
-            "last_ts": None,
-            "ema_attention": None,
-            "ema_faces": None,
-            "frames": 0,
-            "smile_frames": 0,
-            "present_frames": 0,       # frames with faces > 0
-            "inattentive_since": None,
-            "away_since": None,
-            "nudges": 0,
-            "nudged_this_question": False,
-            "question_start_ts": _now(),
-            "question_summaries": [],  # list per question
-        }
-    return sess["face"]
+def _new_face_state() -> dict:
+    """Face-metrics state of an interview session (kept apart from the session,
+    see storage.get_face)."""
+    return {
+        "last_ts": None,
+        "ema_attention": None,
+        "ema_faces": None,
+        "frames": 0,
+        "smile_frames": 0,
+        "present_frames": 0,       # frames with faces > 0
+        "inattentive_since": None,
+        "away_since": None,
+        "nudges": 0,
+        "nudged_this_question": False,
+        "question_start_ts": _now(),
+        "question_summaries": [],  # list per question
+        # running totals over question_summaries (see _close_question)
+        "tot_frames": 0,
+        "tot_present_frames": 0,
+        "tot_smile_frames": 0,
+        "tot_attention_frames": 0.0,  # sum of avg_attention * frames
+    }
+
+def _ensure_totals(st: dict):
+    # Sessions saved before the running totals existed: add them up once
+    if "tot_frames" not in st:
+        qs = st["question_summaries"]
+        st["tot_frames"] = sum(q["frames"] for q in qs)
+        st["tot_present_frames"] = sum(q["present_frames"] for q in qs)
+        st["tot_smile_frames"] = sum(q["smile_frames"] for q in qs)
+        st["tot_attention_frames"] = sum((q["avg_attention"] or 0) * q["frames"] for q in qs)
+
+def _close_question(st: dict):
+    """Append the current question's summary and fold it into the totals."""
+    _ensure_totals(st)
+    summary = {
+        "frames": st["frames"],
+        "present_frames": st["present_frames"],
+        "smile_frames": st["smile_frames"],
+        "avg_attention": st["ema_attention"] if st["ema_attention"] is not None else 0.0,
+        "duration_s": max(0, _now() - (st["question_start_ts"] or _now())),
+        "nudged": st["nudged_this_question"],
+    }
+    st["question_summaries"].append(summary)
+    st["tot_frames"] += summary["frames"]
+    st["tot_present_frames"] += summary["present_frames"]
+    st["tot_smile_frames"] += summary["smile_frames"]
+    st["tot_attention_frames"] += (summary["avg_attention"] or 0) * summary["frames"]
 
-def _reset_per_question_face_state(sess: dict):
-    st = _ensure_face_state(sess)
+def _reset_per_question_face_state(st: dict):
     # Push previous question summary if any frames were seen
     if st["frames"] > 0:
-        sess["face"]["question_summaries"].append({
-            "frames": st["frames"],
-            "present_frames": st["present_frames"],
-            "smile_frames": st["smile_frames"],
-            "avg_attention": st["ema_attention"] if st["ema_attention"] is not None else 0.0,
-            "duration_s": max(0, _now() - (st["question_start_ts"] or _now())),
-            "nudged": st["nudged_this_question"],
-        })
+        _close_question(st)
     # Reset rolling state for next question
-    sess["face"].update({
+    st.update({
         "last_ts": None,
         "ema_attention": None,
         "ema_faces": None,
@@ -47,24 +70,17 @@ def _reset_per_question_face_state(sess: dict):
         "question_start_ts": _now(),
     })
 
-def _finalize_face_summary(sess: dict):
-    st = _ensure_face_state(sess)
+def _finalize_face_summary(st: dict):
     # include current question if any frames collected
     if st["frames"] > 0:
-        sess["face"]["question_summaries"].append({
-            "frames": st["frames"],
-            "present_frames": st["present_frames"],
-            "smile_frames": st["smile_frames"],
-            "avg_attention": st["ema_attention"] if st["ema_attention"] is not None else 0.0,
-            "duration_s": max(0, _now() - (st["question_start_ts"] or _now())),
-            "nudged": st["nudged_this_question"],
-        })
-    qs = sess["face"]["question_summaries"]
-    # Aggregate totals
-    total_frames = sum(q["frames"] for q in qs) or 1
-    total_present = sum(q["present_frames"] for q in qs)
-    total_smile = sum(q["smile_frames"] for q in qs)
-    avg_attention = round(sum((q["avg_attention"] or 0) * q["frames"] for q in qs) / total_frames, 3)
+        _close_question(st)
+    _ensure_totals(st)
+    qs = st["question_summaries"]
+    # Aggregate totals, kept up to date by _close_question
+    total_frames = st["tot_frames"] or 1
+    total_present = st["tot_present_frames"]
+    total_smile = st["tot_smile_frames"]
+    avg_attention = round(st["tot_attention_frames"] / total_frames, 3)
     smile_ratio = round(total_smile / total_frames, 3)
     presence_ratio = round(total_present / total_frames, 3)
     return {
@@ -74,6 +90,6 @@ def _finalize_face_summary(sess: dict):
             "presence_ratio": presence_ratio,   # ~% of frames with a detected face
             "smile_ratio": smile_ratio,         # ~% of frames smiling (if provided)
             "avg_attention": avg_attention,
-            "nudges": sess["face"]["nudges"],
+            "nudges": st["nudges"],
         }
     }
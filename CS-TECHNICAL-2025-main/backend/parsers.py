@@ -1,20 +1,52 @@
 # parsers.py
 from __future__ import annotations
+import copy
+import hashlib
 import io
 import re
+import threading
 import unicodedata
-from typing import Dict, Any, List, Tuple
+from collections import OrderedDict
+from typing import BinaryIO, Dict, Any, List, Optional, Tuple
 
 from pypdf import PdfReader
 
+# PyMuPDF (MuPDF, C) extracts text ~10x faster than pypdf. It is AGPL-3.0
+# licensed (commercial licence from Artifex otherwise), so it stays optional:
+# without it we fall back to the pure-Python pypdf extractor.
+try:
+    import pymupdf
+except ImportError:
+    pymupdf = None
+
+# pypdfium2 (PDFium, C; Apache-2.0/BSD) is the permissively licensed fast
+# path, used when PyMuPDF is not installed. PDFium is not thread-safe, so
+# calls into it are serialized.
+try:
+    import pypdfium2
+except ImportError:
+    pypdfium2 = None
+_PDFIUM_LOCK = threading.Lock()
+
+try:  # pyahocorasick: optional multi-pattern substring search in C
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
 # ----------------------------
 # Utilities (case-insensitive & accent-insensitive)
 # ----------------------------
 def _cf(s: str) -> str:
     """Casefold for robust case-insensitive matching."""
-    return (s or "").casefold()
+    s = s or ""
+    # Same result for ASCII, and lower() has the quicker ASCII path
+    return s.lower() if s.isascii() else s.casefold()
 
 def _strip_accents(s: str) -> str:
+    # Pure-ASCII text (most resumes) has nothing to strip; CPython knows a
+    # str is ASCII without scanning it
+    if s.isascii():
+        return s
     try:
         return unicodedata.normalize("NFKD", s).encode("ascii", "ignore").decode("ascii")
     except Exception:
@@ -29,6 +61,13 @@ def _norm_ci(s: str) -> str:
 # ----------------------------
 EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@([A-Za-z0-9.-]+\.[A-Za-z]{2,})")
 PHONE_RE = re.compile(r"(\+?\d[\d\s().-]{7,})")
+DATE_RE = re.compile(r"(20\d{2}|19\d{2})")
+DATE_RANGE_RE = re.compile(r"(19|20)\d{2}.*?(present|now|\d{4})", re.I)
+YEAR_RE = re.compile(r"(19|20)\d{2}")
+NAME_JUNK_RE = re.compile(r"[^A-Za-z\s.'-]")
+WS_RUN_RE = re.compile(r"\s+")
+SKILL_SEP_RE = re.compile(r"[,;/|\n•\-]\s*")
+_BULLET_PREFIXES = ("-", "•", "*")
 
 # ----------------------------
 # Canonical dictionaries (keys in casefolded form)
@@ -88,23 +127,75 @@ SKILL_CANON = {
 }
 
 # When scanning free text, keep hits only if in this allowlist (casefolded)
-TECH_ALLOWLIST = { *SKILL_CANON.values(), *[
+TECH_ALLOWLIST = frozenset({ *SKILL_CANON.values(), *[
     "java","c++","c#","go","rust","react","next.js","vue","angular",
     "docker","kubernetes","aws","gcp","azure","postgresql","mysql","mongodb",
     "redis","rabbitmq","tensorflow","pytorch","scikit-learn","opencv","nlp","computer vision",
     "pandas","numpy","sql","fastapi","flask","django","rest","graphql","airflow","spark",
     "git","linux","bash","ci","cd","nodejs","typescript","javascript"
-]}
+]})
 
-ROLE_WORDS = [
+ROLE_WORDS = (
     "backend", "frontend", "full stack", "full-stack", "machine learning", "ml engineer", "data engineer",
     "data scientist", "devops", "cloud engineer", "security", "ios", "android", "mobile", "ai engineer",
     "qa", "test engineer", "product manager", "technical writer", "game developer"
-]
+)
 
-SECTION_HEADERS = [
+SECTION_HEADERS = (
     "education", "experience", "work experience", "skills", "projects", "summary", "profile"
-]
+)
+
+# First offset of every header in one pass, overlapping matches included
+# ("experience" inside "work experience"); group n is SECTION_HEADERS[n-1]
+_SECTION_FIND_RE = re.compile(
+    "(?=" + "|".join(f"({re.escape(h)})" for h in SECTION_HEADERS) + ")", re.I
+)
+
+DEGREE_WORDS = ("bachelor", "master", "phd", "licence", "ingénieur", "engineer")
+
+# Substring vocabularies, keyed by category, in the order results are picked
+# (roles by ROLE_WORDS order, cities by CITY_TO_COUNTRY order; countries by
+# where the text first mentions them).
+_TERMS: Dict[str, Tuple[str, ...]] = {
+    "role": tuple(dict.fromkeys(_cf(r) for r in ROLE_WORDS)),
+    "city": tuple(CITY_TO_COUNTRY),
+    "country": tuple(c for c in [*EMEA, *AMER, *APAC] if c),
+}
+
+def _build_term_automaton():
+    if ahocorasick is None:
+        return None
+    tags: Dict[str, List[str]] = {}
+    for tag, terms in _TERMS.items():
+        for t in terms:
+            tags.setdefault(t, []).append(tag)  # "singapore" is a city and a country
+    auto = ahocorasick.Automaton()
+    for t, ts in tags.items():
+        auto.add_word(t, (t, tuple(ts)))
+    auto.make_automaton()
+    return auto
+
+_TERM_AUTOMATON = _build_term_automaton()
+
+def _find_terms(norm: str) -> Dict[str, Dict[str, int]]:
+    """Every role/city/country term occurring in `norm` (a _norm_ci string),
+    by category, mapped to the offset of its first occurrence.
+
+    One Aho-Corasick pass finds all categories at once; without
+    pyahocorasick, one substring search per term.
+    """
+    found: Dict[str, Dict[str, int]] = {tag: {} for tag in _TERMS}
+    if _TERM_AUTOMATON is None:
+        for tag, terms in _TERMS.items():
+            for t in terms:
+                i = norm.find(t)
+                if i != -1:
+                    found[tag][t] = i
+        return found
+    for end, (term, tags) in _TERM_AUTOMATON.iter(norm):
+        for tag in tags:
+            found[tag].setdefault(term, end - len(term) + 1)
+    return found
 
 # ----------------------------
 # Helpers
@@ -121,14 +212,76 @@ def _clean_text(b: bytes) -> str:
         return b.decode("latin1", errors="ignore")
 
 
-def _extract_text_from_pdf(file_bytes: bytes) -> str:
-    """Extract visible text from a PDF using pypdf.
+# A PDF whose first SCANNED_PROBE_PAGES pages hold fewer than
+# SCANNED_MIN_CHARS characters of text is treated as a scan (no OCR here)
+SCANNED_PROBE_PAGES = 3
+SCANNED_MIN_CHARS = 100
+
+def _read_all(stream: BinaryIO) -> bytes:
+    stream.seek(0)
+    return stream.read()
+
 
-    This ignores images (no OCR), but grabs all text from all pages.
+def _extract_text_from_pdf_mupdf(stream: BinaryIO) -> str:
+    """Extract visible text from a PDF using PyMuPDF (one C call per page).
+
+    MuPDF opens only in-memory buffers or paths, so this reads the whole file.
+    """
+    with pymupdf.open(stream=_read_all(stream), filetype="pdf") as doc:
+        return "\n".join(t for t in (page.get_text("text") for page in doc) if t)
+
+
+def _extract_text_from_pdf_pdfium(stream: BinaryIO) -> str:
+    """Extract visible text from a PDF using pypdfium2 (one C call per page),
+    reading the file through `stream` as PDFium needs it."""
+    chunks: List[str] = []
+    with _PDFIUM_LOCK:
+        stream.seek(0)
+        pdf = pypdfium2.PdfDocument(stream)
+        try:
+            for page in pdf:
+                textpage = page.get_textpage()
+                try:
+                    t = textpage.get_text_range()
+                finally:
+                    textpage.close()
+                    page.close()
+                if t:
+                    chunks.append(t.replace("\r\n", "\n"))
+        finally:
+            pdf.close()
+    return "\n".join(chunks)
+
+
+def _extract_text_from_pdf(stream: BinaryIO) -> str:
+    """Extract visible text from a PDF using PyMuPDF or pypdfium2, or pypdf
+    if neither is installed or the fast path raised.
+
+    This ignores images (no OCR), but grabs all text from all pages. With
+    pypdf, a document whose first pages carry almost no text is taken to be
+    scanned and the remaining pages are skipped.
     """
+    if pymupdf is not None:
+        try:
+            text = _extract_text_from_pdf_mupdf(stream)
+            print(f"[parsers] PDF text length: {len(text)} chars (pymupdf)")
+            return text
+        except Exception as e:
+            # fall through: pdfium or pypdf may still read what MuPDF rejected
+            print(f"[parsers] PyMuPDF failed: {e}")
+    if pypdfium2 is not None:
+        try:
+            text = _extract_text_from_pdf_pdfium(stream)
+            print(f"[parsers] PDF text length: {len(text)} chars (pdfium)")
+            return text
+        except Exception as e:
+            # fall through: pypdf may still read what PDFium rejected
+            print(f"[parsers] pdfium failed: {e}")
     try:
-        reader = PdfReader(io.BytesIO(file_bytes))
+        stream.seek(0)
+        reader = PdfReader(stream)
         chunks: List[str] = []
+        n_chars = 0
         for idx, page in enumerate(reader.pages):
             try:
                 t = page.extract_text() or ""
@@ -136,13 +289,19 @@ def _extract_text_from_pdf(file_bytes: bytes) -> str:
                 t = ""
             if t:
                 chunks.append(t)
+                n_chars += len(t.strip())
+            # pypdf still walks every content stream of an image-only page;
+            # don't do that for the rest of a scanned document
+            if idx + 1 == SCANNED_PROBE_PAGES and n_chars < SCANNED_MIN_CHARS:
+                print(f"[parsers] No text layer in the first {SCANNED_PROBE_PAGES} pages, skipping the rest")
+                break
         text = "\n".join(chunks)
         print(f"[parsers] PDF text length: {len(text)} chars")
         return text
     except Exception as e:
         print(f"[parsers] PdfReader failed: {e}")
         # Fall back to naive decoding if PDF parsing fails
-        return _clean_text(file_bytes)
+        return _clean_text(_read_all(stream))
 
 def _extract_email_domain(text: str) -> Tuple[str, str]:
     m = EMAIL_RE.search(text or "")
@@ -163,18 +322,32 @@ def _infer_region(country: str) -> str:
     if c in APAC: return "APAC"
     return "Remote"
 
-def _naive_sections(text: str) -> Dict[str, str]:
+def _lines(text: str) -> List[str]:
+    """Non-blank lines of `text`, stripped (one strip per line)."""
+    return [ln for ln in map(str.strip, text.splitlines()) if ln]
+
+def _naive_sections(text: str) -> Tuple[Dict[str, str], Dict[str, List[str]]]:
     """Very lightweight section splitter based on common headings.
 
     Keeps the original casing/text but indexes by lower-cased header name
-    ("experience", "education", "skills", etc.).
+    ("experience", "education", "skills", etc.). Also returns each section's
+    non-blank lines, split once here for all the section parsers.
     """
     lower = _cf(text)
     idxs: List[Tuple[int, str]] = []
-    for h in SECTION_HEADERS:
-        i = lower.find(_cf(h))
-        if i != -1:
-            idxs.append((i, h))
+    if len(lower) == len(text):
+        # One str.find per header beats a combined regex here (measured)
+        for h in SECTION_HEADERS:
+            i = lower.find(h)
+            if i != -1:
+                idxs.append((i, h))
+    else:
+        # Casefolding changed the length ("ß" -> "ss"), so offsets in `lower`
+        # would not line up with `text`: match on the text itself instead
+        seen: Dict[str, int] = {}
+        for m in _SECTION_FIND_RE.finditer(text):
+            seen.setdefault(SECTION_HEADERS[m.lastindex - 1], m.start())
+        idxs = [(i, h) for h, i in seen.items()]
     idxs.sort()
     sections: Dict[str, str] = {}
     for n, (start, name) in enumerate(idxs):
@@ -183,17 +356,14 @@ def _naive_sections(text: str) -> Dict[str, str]:
         block = text[start:end].strip()
         header = name.lower()
         sections[header] = block
-    return sections
+    return sections, {name: _lines(block) for name, block in sections.items()}
 
 
-def _extract_summary(sections: Dict[str, str]) -> str:
+def _extract_summary(section_lines: Dict[str, List[str]]) -> str:
     """Return a short summary/profile paragraph if present."""
     for key in ("summary", "profile"):
-        block = sections.get(key)
-        if not block:
-            continue
         # Drop the heading line itself; keep the first 3–4 lines joined.
-        lines = [ln.strip() for ln in block.splitlines() if ln.strip()]
+        lines = section_lines.get(key)
         if not lines:
             continue
         # Heuristic: skip the first line if it basically *is* the header label
@@ -205,31 +375,30 @@ def _extract_summary(sections: Dict[str, str]) -> str:
     return ""
 
 
-def _extract_education(sections: Dict[str, str]) -> List[Dict[str, Any]]:
+def _extract_education(section_lines: Dict[str, List[str]]) -> List[Dict[str, Any]]:
     """Parse a loose list of education entries from the education section.
 
     Output is intentionally simple and robust:
     [{"institution": ..., "degree": ..., "years": ...}, ...]
     """
-    block = sections.get("education") or ""
-    if not block:
+    lines = section_lines.get("education") or []
+    if not lines:
         return []
 
-    lines = [ln.strip() for ln in block.splitlines() if ln.strip()]
     # Drop heading-like first line
     if lines and _cf("education") in _cf(lines[0]):
         lines = lines[1:]
 
     entries: List[Dict[str, Any]] = []
     current: Dict[str, Any] = {}
-    DATE_RE = re.compile(r"(20\d{2}|19\d{2})")
 
     for ln in lines:
         if not current:
             current = {"institution": ln, "degree": "", "years": ""}
         else:
             # Attach degree/years hints to current entry
-            if any(k in _cf(ln) for k in ["bachelor", "master", "phd", "licence", "ingénieur", "engineer"]):
+            cf = _cf(ln)
+            if any(k in cf for k in DEGREE_WORDS):
                 current["degree"] = (current.get("degree") or "") or ln
             if DATE_RE.search(ln):
                 years = current.get("years") or ""
@@ -248,25 +417,21 @@ def _extract_education(sections: Dict[str, str]) -> List[Dict[str, Any]]:
     return entries[:10]
 
 
-def _extract_experience(sections: Dict[str, str]) -> List[Dict[str, Any]]:
+def _extract_experience(section_lines: Dict[str, List[str]]) -> List[Dict[str, Any]]:
     """Parse experience/work experience into a list of simple roles.
 
     Each role: {"title", "company", "location", "start", "end", "bullets"}.
     This is heuristic but good enough for downstream analytics.
     """
-    block = sections.get("experience") or sections.get("work experience") or ""
-    if not block:
+    lines = section_lines.get("experience") or section_lines.get("work experience") or []
+    if not lines:
         return []
 
-    lines = [ln.rstrip() for ln in block.splitlines() if ln.strip()]
     # Drop heading-like first line
     first = lines[0] if lines else ""
     if first and any(_cf(h) in _cf(first) for h in ["experience", "work experience"]):
         lines = lines[1:]
 
-    DATE_RANGE_RE = re.compile(r"(19|20)\d{2}.*?(present|now|\d{4})", re.I)
-    BULLET_PREFIX_RE = re.compile(r"^\s*[-•*]\s+")
-
     roles: List[Dict[str, Any]] = []
     current: Dict[str, Any] = {"title": "", "company": "", "location": "", "start": "", "end": "", "bullets": []}
 
@@ -279,10 +444,10 @@ def _extract_experience(sections: Dict[str, str]) -> List[Dict[str, Any]]:
         current = {"title": "", "company": "", "location": "", "start": "", "end": "", "bullets": []}
 
     for ln in lines:
-        raw = ln.strip()
+        raw = ln  # already stripped by _naive_sections
 
         # Bullet line → add to bullets of current role
-        if raw.startswith("-") or raw.startswith("•") or raw.startswith("*"):
+        if raw.startswith(_BULLET_PREFIXES):
             current.setdefault("bullets", []).append(raw.lstrip("-•* "))
             continue
 
@@ -290,7 +455,7 @@ def _extract_experience(sections: Dict[str, str]) -> List[Dict[str, Any]]:
         m = DATE_RANGE_RE.search(raw)
         if m:
             # simplistic split: first year = start, last token = end
-            years = re.findall(r"(19|20)\d{2}", raw)
+            years = YEAR_RE.findall(raw)
             if years:
                 current["start"] = years[0][0] + years[0][1:] if isinstance(years[0], tuple) else years[0]
                 if len(years) > 1:
@@ -330,7 +495,7 @@ def _guess_name(lines: List[str]) -> str:
     for ln in lines[:5]:
         if "@" in ln: 
             continue
-        t = re.sub(r"[^A-Za-z\s.'-]", "", ln).strip()
+        t = NAME_JUNK_RE.sub("", ln).strip()
         if t and len(t.split()) <= 5:
             return t[:80]
     return ""
@@ -341,22 +506,41 @@ def _normalize_skill_token(tok: str) -> str:
     if not raw: return ""
     cf = _norm_ci(raw)
     # normalize punctuation spaces: "fast api" -> "fast api"
-    cf = re.sub(r"\s+", " ", cf)
+    cf = WS_RUN_RE.sub(" ", cf)
     # map aliases
     if cf in SKILL_CANON:
         return SKILL_CANON[cf]
     return cf  # fallback: already casefolded canonical
 
-def _extract_skills(text: str, sections: Dict[str, str]) -> List[str]:
+# Free-text tokens / word pairs that normalize to an allowlisted skill, mapped
+# to that skill, so the text scan is a dict lookup per token
+_SKILL_TEXT_PUNCT_RE = re.compile(r"[^a-z0-9+#.\s-]")
+# The same substitution as a byte table: _norm_ci output is always ASCII, so
+# bytes.translate (one table lookup per byte) can stand in for the regex
+_SKILL_TEXT_PUNCT_TABLE = bytes(
+    0x20 if _SKILL_TEXT_PUNCT_RE.match(chr(i)) else i for i in range(256)
+)
+_SKILL_TOKEN_RE = re.compile(r"\b[a-z0-9+#.]{2,}\b")
+_TEXT_SKILLS = {
+    t: SKILL_CANON.get(t, t)
+    for t in (*SKILL_CANON, *TECH_ALLOWLIST)
+    if SKILL_CANON.get(t, t) in TECH_ALLOWLIST
+}
+_TEXT_UNIGRAMS = {t: s for t, s in _TEXT_SKILLS.items() if " " not in t}
+_TEXT_BIGRAMS = {t: s for t, s in _TEXT_SKILLS.items() if t.count(" ") == 1}
+_BIGRAM_FIRST = frozenset(t.split(" ", 1)[0] for t in _TEXT_BIGRAMS)
+
+def _extract_skills(text_norm: str, sections: Dict[str, str]) -> List[str]:
     """
     Pull skills from:
       1) Skills section (if present)
       2) Anywhere in text by scanning words/phrases and matching allowlist
     Normalize case (handles Python/PYTHON/Py → python, etc.)
+    `text_norm` is _norm_ci() of the whole text.
     """
     # 1) from skills section
     block = sections.get("skills", "") or ""
-    raw = re.split(r"[,;/|\n•\-]\s*", block)
+    raw = SKILL_SEP_RE.split(block)
     prelim = []
     for tok in raw:
         norm = _normalize_skill_token(tok)
@@ -368,78 +552,115 @@ def _extract_skills(text: str, sections: Dict[str, str]) -> List[str]:
 
     # 2) from entire text (catch capitalized tokens like "Python", "PostgreSQL")
     # Find tokens and 2-grams likely to be tech
-    txt_cf = _norm_ci(text)
     # normalize some punctuation to space
-    txt_cf = re.sub(r"[^a-z0-9+#.\s-]", " ", txt_cf)
-    candidates = set()
+    if text_norm.isascii():
+        txt_cf = text_norm.encode("ascii").translate(_SKILL_TEXT_PUNCT_TABLE).decode("ascii")
+    else:
+        txt_cf = _SKILL_TEXT_PUNCT_RE.sub(" ", text_norm)
     # single tokens
-    for m in re.finditer(r"\b[a-z0-9+#.]{2,}\b", txt_cf):
-        candidates.add(m.group(0))
-    # bigrams like "computer vision", "fast api"
+    prelim += [_TEXT_UNIGRAMS[t] for t in _SKILL_TOKEN_RE.findall(txt_cf) if t in _TEXT_UNIGRAMS]
+    # bigrams like "computer vision", "fast api": only built after a word that
+    # can start one
     words = txt_cf.split()
-    for i in range(len(words)-1):
-        bg = f"{words[i]} {words[i+1]}"
-        if 3 <= len(bg) <= 30:
-            candidates.add(bg)
+    if not _BIGRAM_FIRST.isdisjoint(words):
+        for i in range(len(words) - 1):
+            if words[i] in _BIGRAM_FIRST:
+                hit = _TEXT_BIGRAMS.get(words[i] + " " + words[i + 1])
+                if hit:
+                    prelim.append(hit)
 
-    for tok in candidates:
-        norm = _normalize_skill_token(tok)
-        if norm in TECH_ALLOWLIST:
-            prelim.append(norm)
+    # de-duplicate, first occurrence wins; every entry is already a canonical
+    # TECH_ALLOWLIST skill, so no further normalization is needed
+    return list(dict.fromkeys(prelim))[:60]
 
-    # de-duplicate case-insensitively while preserving canonical lowercase
-    out, seen = [], set()
-    for s in prelim:
-        key = _norm_ci(s)
-        if key not in seen:
-            seen.add(key)
-            out.append(s)
-    return out[:60]
-
-def _extract_roles(text: str) -> List[str]:
-    low = _cf(text)
-    hits, seen = [], set()
-    for r in ROLE_WORDS:
-        if _cf(r) in low and _cf(r) not in seen:
-            hits.append(_cf(r)); seen.add(_cf(r))
-    return hits[:5]
+def _extract_roles(found: Dict[str, Dict[str, int]]) -> List[str]:
+    """First five ROLE_WORDS (casefolded) among the terms found by _find_terms."""
+    return [r for r in _TERMS["role"] if r in found["role"]][:5]
 
 def _extract_phone(text: str) -> str:
     m = PHONE_RE.search(text or "")
     return m.group(1).strip() if m else ""
 
-def _find_location(lines: List[str], text: str) -> Tuple[str, str]:
+def _find_location(lines: List[str], found: Dict[str, Dict[str, int]]) -> Tuple[str, str]:
     """
     Return (city_or_hint, country_guess). Matches are case-insensitive.
+    `found` is _find_terms() of the whole text.
     """
-    # Look in top header lines first
-    for ln in lines[:8]:
-        cf = _norm_ci(ln)
-        for city, country in CITY_TO_COUNTRY.items():
-            if city in cf:
-                return (ln.strip(), country)
-
-    # Search the whole text for explicit country names (case-insensitive)
-    low = _norm_ci(text)
-    for country in list(EMEA) + list(AMER) + list(APAC):
-        # country already normalized; compare to normalized text
-        if country and country in low:
-            # return the original-cased best-effort country name
-            return (country.title(), country.title())
+    # Look in top header lines first (only for cities the text mentions at all)
+    cities = [c for c in _TERMS["city"] if c in found["city"]]
+    if cities:
+        for ln in lines[:8]:
+            cf = _norm_ci(ln)
+            for city in cities:
+                if city in cf:
+                    return (ln.strip(), CITY_TO_COUNTRY[city])
+
+    # Explicit country names anywhere in the text (case-insensitive); the one
+    # mentioned first wins
+    countries = found["country"]
+    if countries:
+        country = min(countries, key=countries.__getitem__)
+        # return the original-cased best-effort country name
+        return (country.title(), country.title())
 
     return ("", "")
 
 # ----------------------------
 # Main entry
 # ----------------------------
-def parse_resume_bytes(file_bytes: bytes) -> Dict[str, Any]:
+# Recent parses by SHA-256 of the file, so the same bytes uploaded again (by
+# another account, or a retried request) skip PDF extraction and parsing.
+# Entries hold resume text: forget_parsed() drops one when its resume is deleted.
+PARSE_CACHE_MAX = 64
+_parse_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_parse_lock = threading.Lock()
+
+def forget_parsed(digest: str) -> None:
+    with _parse_lock:
+        _parse_cache.pop(digest, None)
+
+def parse_resume_bytes(file_bytes: bytes, digest: Optional[str] = None) -> Dict[str, Any]:
+    """Parse an uploaded file; `digest` is its SHA-256 hex if the caller has it."""
+    return parse_resume_stream(io.BytesIO(file_bytes), digest or hashlib.sha256(file_bytes).hexdigest())
+
+def parse_resume_stream(stream: BinaryIO, digest: str) -> Dict[str, Any]:
+    """parse_resume_bytes() for a seekable binary file (e.g. the spooled upload)
+    with SHA-256 hex `digest`. pypdf and pypdfium2 read it as they go rather
+    than loading it whole."""
+    key = digest
+    with _parse_lock:
+        hit = _parse_cache.get(key)
+        if hit is not None:
+            _parse_cache.move_to_end(key)
+    if hit is not None:
+        # Callers own (and may modify) what they get back
+        return copy.deepcopy(hit)
+
     # Try PDF extraction first; if that fails or yields too little, fall back
     # to simple decoding.
-    text = _extract_text_from_pdf(file_bytes)
+    text = _extract_text_from_pdf(stream)
     if len(text.strip()) < 50:  # likely bad extraction
         print("[parsers] PDF text too short, falling back to naive decode")
-        text = _clean_text(file_bytes)
-    lines = [l.strip() for l in text.splitlines() if l.strip()]
+        text = _clean_text(_read_all(stream))
+    parsed = parse_resume_text(text)
+    with _parse_lock:
+        _parse_cache[key] = copy.deepcopy(parsed)
+        _parse_cache.move_to_end(key)
+        while len(_parse_cache) > PARSE_CACHE_MAX:
+            _parse_cache.popitem(last=False)
+    return parsed
+
+
+# Longest text parsed and returned as raw_text
+RAW_TEXT_MAX = 200000
+
+def parse_resume_text(text: str) -> Dict[str, Any]:
+    """Structured fields (skills, roles, region, ...) from already-extracted text."""
+    # Cap before any scanning, so every regex below is bounded and the fields
+    # agree with raw_text (which app.py re-parses for older payloads)
+    if len(text) > RAW_TEXT_MAX:
+        text = text[:RAW_TEXT_MAX]
+    lines = _lines(text)
 
     email, domain = _extract_email_domain(text)
     phone = _extract_phone(text)
@@ -447,18 +668,21 @@ def parse_resume_bytes(file_bytes: bytes) -> Dict[str, Any]:
 
     # Country via TLD (case-insensitive)
     country_tld = _tld_to_country(domain or "")
-    # Country via content (case-insensitive city/country scan)
-    city_or_hint, country_scan = _find_location(lines, text)
+    # Country via content (case-insensitive city/country scan); roles, cities
+    # and countries all come out of one scan of the normalized text
+    text_norm = _norm_ci(text)
+    found = _find_terms(text_norm)
+    city_or_hint, country_scan = _find_location(lines, found)
 
     country = country_scan or country_tld
     region = _infer_region(country)
 
-    sections = _naive_sections(text)
-    skills = _extract_skills(text, sections)
-    roles = _extract_roles(text)
-    summary = _extract_summary(sections)
-    education = _extract_education(sections)
-    experience = _extract_experience(sections)
+    sections, section_lines = _naive_sections(text)
+    skills = _extract_skills(text_norm, sections)
+    roles = _extract_roles(found)
+    summary = _extract_summary(section_lines)
+    education = _extract_education(section_lines)
+    experience = _extract_experience(section_lines)
 
     # Best-effort location string prioritizing specific hints
     location = city_or_hint or country or region or "Remote"
@@ -472,5 +696,5 @@ def parse_resume_bytes(file_bytes: bytes) -> Dict[str, Any]:
         "education": education,
         "experience": experience,
         "summary": summary,
-        "raw_text": text[:200000],
+        "raw_text": text,
     }
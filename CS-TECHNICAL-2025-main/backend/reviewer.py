@@ -1,96 +1,110 @@
 # reviewer.py
 import re
-from typing import Dict, Any, List
-from collections import Counter
+from typing import Dict, Any, Iterable, List
 
-ACTION_VERBS = [
+# Vocabularies are immutable; the tuples keep their order because it shows up
+# in the output (summary stack order, buzzword list)
+ACTION_VERBS = frozenset({
     "built","designed","implemented","launched","migrated","refactored",
     "optimized","reduced","increased","automated","integrated","owned",
     "led","mentored","delivered","deployed","scaled","monitored","tested"
-]
-TECH_HINTS = [
+})
+TECH_HINTS = (
     "python","javascript","typescript","java","c++","go","rust","react","node","fastapi","flask",
     "django","postgres","mysql","mongodb","redis","docker","kubernetes","aws","gcp","azure",
     "graphql","rest","airflow","spark","pytorch","tensorflow","sklearn","linux","bash","git","ci","cd"
-]
-FILLERS = ["passionate","hard-working","fast learner","self-starter","innovative","synergy","rockstar"]
+)
+FILLERS = ("passionate","hard-working","fast learner","self-starter","innovative","synergy","rockstar")
 
-NUMERIC_RE = re.compile(r"\b(\d+(\.\d+)?%|\d{2,})\b")
-BULLET_RE = re.compile(r"(^\s*[-•*]\s+.+)", re.M)
+# Only ever counted, so no capture groups (findall then returns plain strings)
+NUMERIC_RE = re.compile(r"\b(?:\d+(?:\.\d+)?%|\d{2,})\b")
+BULLET_RE = re.compile(r"^\s*[-•*]\s+.+", re.M)
 SENT_END_RE = re.compile(r"[.!?]+")
+WORD_RE = re.compile(r"\w+")
+TRAILING_DOTS_RE = re.compile(r"[.]+$")
 
-def _fk_grade(text: str) -> float:
+def _vocab_re(words: Iterable[str]) -> "re.Pattern[str]":
+    # One alternation per vocabulary: a single scan finds every whole-word hit
+    # (longest first, so e.g. "javascript" is never cut short by "java")
+    alts = sorted(words, key=len, reverse=True)
+    return re.compile(r"\b(?:" + "|".join(map(re.escape, alts)) + r")\b")
+
+ACTION_VERB_RE = _vocab_re(ACTION_VERBS)
+TECH_HINT_RE = _vocab_re(TECH_HINTS)
+
+def _tech_hits(low: str) -> List[str]:
+    """TECH_HINTS found as whole words in the lower-cased text, in list order."""
+    found = set(TECH_HINT_RE.findall(low))
+    return [t for t in TECH_HINTS if t in found]
+
+def _fk_grade(text: str, n_words: int) -> float:
     # Very light readability proxy (not exact FK)
-    words = max(1, len(re.findall(r"\w+", text)))
+    words = max(1, n_words)
     sents = max(1, len(SENT_END_RE.findall(text)))
     avgw = words / sents
     return round(4.0 + 0.6 * min(25, avgw), 1)
 
-def _has_section(text: str, name: str) -> bool:
-    return name.lower() in text.lower()
-
-def _count_action_verbs(text: str) -> int:
-    low = text.lower()
-    return sum(1 for v in ACTION_VERBS if re.search(rf"\b{re.escape(v)}\b", low))
+def _has_section(low: str, name: str) -> bool:
+    # `low` is the lower-cased text, `name` a lower-case section name
+    return name in low
 
-def _collect_bullets(text: str) -> List[str]:
-    return [m.strip() for m in BULLET_RE.findall(text)]
+def _count_action_verbs(low: str) -> int:
+    """Distinct ACTION_VERBS used in the (already lower-cased) text."""
+    return len(set(ACTION_VERB_RE.findall(low)))
 
-def _score_ats(text: str) -> int:
+def _score_ats(low: str, n_words: int, n_numbers: int, n_bullets: int, n_verbs: int) -> int:
     score = 40
-    low = text.lower()
 
     # Sections
     for s in ("education","experience","skills","projects","summary","profile","work experience"):
-        if _has_section(text, s): score += 4
+        if _has_section(low, s): score += 4
 
     # Length / density
-    n_words = len(re.findall(r"\w+", text))
     if 700 <= n_words <= 1200: score += 8
     elif 400 <= n_words < 700 or 1200 < n_words <= 1800: score += 4
 
     # Action verbs & numbers
-    score += min(12, _count_action_verbs(text))  # cap
-    if len(NUMERIC_RE.findall(text)) >= 6: score += 10
-    elif len(NUMERIC_RE.findall(text)) >= 3: score += 6
+    score += min(12, n_verbs)  # cap
+    if n_numbers >= 6: score += 10
+    elif n_numbers >= 3: score += 6
 
     # Concrete tech
-    tech_hits = sum(1 for t in TECH_HINTS if re.search(rf"\b{re.escape(t)}\b", low))
+    tech_hits = len(_tech_hits(low))
     score += min(12, tech_hits // 3 * 2)
 
     # Bullets
-    bullets = _collect_bullets(text)
-    if len(bullets) >= 8: score += 8
-    elif len(bullets) >= 4: score += 4
+    if n_bullets >= 8: score += 8
+    elif n_bullets >= 4: score += 4
 
     return max(0, min(100, score))
 
-def _find_gaps(text: str) -> List[str]:
+def _find_gaps(low: str, n_numbers: int, n_bullets: int, n_verbs: int) -> List[str]:
     gaps = []
-    low = text.lower()
 
-    if not _has_section(text,"experience"):
+    if not _has_section(low,"experience"):
         gaps.append("Add an Experience/Work Experience section.")
-    if not _has_section(text,"skills"):
+    if not _has_section(low,"skills"):
         gaps.append("Include a Skills section with concrete tools & levels.")
-    if not _collect_bullets(text):
+    if not n_bullets:
         gaps.append("Use bullet points for achievements (1–2 lines each).")
-    if len(NUMERIC_RE.findall(text)) < 3:
+    if n_numbers < 3:
         gaps.append("Quantify impact (%, time, cost, users, latency).")
-    if _count_action_verbs(text) < 5:
+    if n_verbs < 5:
         gaps.append("Start bullets with strong action verbs (Built, Reduced, Led).")
     if any(f in low for f in FILLERS):
         gaps.append("Remove filler words (e.g., “passionate”, “rockstar”).")
     return gaps
 
-def _rewrite_summary_from_text(text: str, parsed: Dict[str, Any]) -> str:
+def _rewrite_summary_from_text(low: str, parsed: Dict[str, Any]) -> str:
     # Prefer structured hard skills if available, otherwise fall back to raw text scan
     structured_skills = (parsed.get("skills") or {}).get("hard") or []
     if structured_skills:
         hits = [s.lower() for s in structured_skills]
     else:
-        hits = [t for t in TECH_HINTS if re.search(rf"\b{re.escape(t)}\b", text.lower())]
-    top = [w for w, _ in Counter(hits).most_common(6)]
+        hits = _tech_hits(low)
+    # Both sources are already de-duplicated, so every count would be 1 and
+    # most_common() would just return the first six; keep those directly
+    top = list(dict.fromkeys(hits))[:6]
     tech_str = ", ".join(top) if top else "modern backend and cloud tooling"
     return (
         f"Engineer with hands-on delivery across APIs, automation, and reliability. "
@@ -103,7 +117,7 @@ def _rewrite_bullets_from_text(text: str) -> List[str]:
     candidates = [ln.strip("-•* ").strip() for ln in text.splitlines() if len(ln.strip()) > 0]
     sample = [c for c in candidates if len(c.split()) > 5][:8]
     for s in sample[:3]:
-        bullets.append(f"• {re.sub(r'[.]+$', '', s)} (measured via latency/errors/users; add %/ms).")
+        bullets.append(f"• {TRAILING_DOTS_RE.sub('', s)} (measured via latency/errors/users; add %/ms).")
     if not bullets:
         bullets = [
             "• Built and deployed REST APIs; reduced P95 latency by 35% by optimizing queries and caching.",
@@ -114,13 +128,19 @@ def _rewrite_bullets_from_text(text: str) -> List[str]:
 
 def reviewer(parsed: Dict[str, Any]) -> Dict[str, Any]:
     text = parsed.get("raw_text", "") or ""
-    ats = _score_ats(text)
-    grade = _fk_grade(text)
-    gaps = _find_gaps(text)
-    dup_buzz = [w for w in FILLERS if w in text.lower()]
+    # Lower-case and count once; every helper below reads these
+    low = text.lower()
+    n_words = len(WORD_RE.findall(text))
+    n_numbers = len(NUMERIC_RE.findall(text))
+    n_bullets = len(BULLET_RE.findall(text))
+    n_verbs = _count_action_verbs(low)
+    ats = _score_ats(low, n_words, n_numbers, n_bullets, n_verbs)
+    grade = _fk_grade(text, n_words)
+    gaps = _find_gaps(low, n_numbers, n_bullets, n_verbs)
+    dup_buzz = [w for w in FILLERS if w in low]
 
     rewrite = {
-        "summary": _rewrite_summary_from_text(text, parsed),
+        "summary": _rewrite_summary_from_text(low, parsed),
         "sample_bullets": _rewrite_bullets_from_text(text),
         "tips": [
             "Keep bullets to ~1–2 lines each; one action, one result.",
@@ -131,12 +151,12 @@ def reviewer(parsed: Dict[str, Any]) -> Dict[str, Any]:
 
     # minimal quality flags for the UI
     flags = {
-        "has_experience": _has_section(text,"experience") or _has_section(text,"work experience"),
-        "has_skills": _has_section(text,"skills"),
-        "bullets_count": len(_collect_bullets(text)),
-        "numbers_count": len(NUMERIC_RE.findall(text)),
-        "action_verbs_count": _count_action_verbs(text),
-        "word_count": len(re.findall(r'\w+', text)),
+        "has_experience": _has_section(low,"experience") or _has_section(low,"work experience"),
+        "has_skills": _has_section(low,"skills"),
+        "bullets_count": n_bullets,
+        "numbers_count": n_numbers,
+        "action_verbs_count": n_verbs,
+        "word_count": n_words,
     }
 
     return {
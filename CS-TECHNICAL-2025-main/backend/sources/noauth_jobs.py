@@ -1,45 +1,149 @@
 # sources/noauth_jobs.py
 from __future__ import annotations
-from typing import List, Iterable, Dict, Any, Set
-import time, os, logging, re
+from typing import List, Iterable, Dict, Any, Set, Callable, Tuple
+import os, logging, re, threading, time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
+import soupsieve
+
+from helpers import run_native
+try:
+    import lxml  # noqa: F401  (C-backed HTML parser, several times faster)
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+try:  # pyahocorasick: optional multi-pattern substring search in C
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
 
 UA = os.getenv("SCRAPER_UA", "Mozilla/5.0 (compatible; EmployabilityBot/0.2)")
 HEADERS = {"User-Agent": UA, "Accept": "application/json,text/html,*/*"}
 TIMEOUT = 20
+RETRIES = 2
+RETRY_BACKOFF = 0.5
+# Sources are fetched concurrently; one that is still running after this many
+# seconds is left out of the response rather than stalling it. The default is
+# one request's full retry budget: every attempt runs to TIMEOUT, plus
+# urllib3's backoff sleeps between them (none before the first retry).
+_RETRY_BUDGET = (RETRIES + 1) * TIMEOUT + sum(RETRY_BACKOFF * 2 ** (n - 1) for n in range(2, RETRIES + 1))
+SOURCE_DEADLINE = float(os.getenv("SCRAPER_DEADLINE") or _RETRY_BUDGET)
+
+# One session for every scraper: connections (and TLS sessions) to each job
+# board are pooled and reused across pages, sources and requests
+SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
+SESSION.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=32,
+                                      max_retries=Retry(total=RETRIES, backoff_factor=RETRY_BACKOFF)))
+
+# JSON feeds (RemoteOK, Remotive, Arbeitnow pages) don't depend on the skills
+# searched for, so each is decoded once and shared by every search for this
+# many seconds; after that it is revalidated with ETag/Last-Modified, and a
+# 304 reuses the decoded body. One entry per feed URL/page, so no eviction.
+FEED_CACHE_TTL = int(os.getenv("SCRAPER_FEED_TTL", "300"))
+_feeds: Dict[tuple, tuple] = {}  # (url, params) -> (fetched_at, etag, last_modified, data)
+_feeds_lock = threading.Lock()
 
 LOG = logging.getLogger("scrape")
 LOG.setLevel(logging.INFO)
 
 def _norm(s): return (s or "").strip()
+_CANON_RE = re.compile(r"[^a-z0-9+.#\-\s]")
+_ALIAS = {
+    "py": "python", "python3": "python",
+    "js": "javascript", "node.js":"nodejs", "node":"nodejs",
+    "ts": "typescript", "tf":"tensorflow", "tfjs":"tensorflow",
+    "sklearn":"scikit-learn", "postgres":"postgresql",
+    "fast api":"fastapi", "fast-api":"fastapi"
+}
 def _canon(skill: str) -> str:
-    s = skill.lower().strip()
-    s = re.sub(r"[^a-z0-9+.#\-\s]", "", s)
-    alias = {
-        "py": "python", "python3": "python",
-        "js": "javascript", "node.js":"nodejs", "node":"nodejs",
-        "ts": "typescript", "tf":"tensorflow", "tfjs":"tensorflow",
-        "sklearn":"scikit-learn", "postgres":"postgresql",
-        "fast api":"fastapi", "fast-api":"fastapi"
-    }
-    return alias.get(s, s)
+    s = _CANON_RE.sub("", skill.lower().strip())
+    return _ALIAS.get(s, s)
+
+Matcher = Callable[[Iterable[str], Iterable[str]], bool]
+
+def build_matcher(skills: List[str]) -> Matcher:
+    """Predicate match(texts, tags): does any of `skills` (canonicalized once,
+    here) occur in the joined lower-cased texts, or equal one of the tags?
 
-def _match(skills: List[str], texts: Iterable[str], tags: Iterable[str] = ()):
-    text = " ".join([t for t in texts if t]).lower()
-    tagset = {str(t).lower() for t in tags if t}
-    for k in ( _canon(x) for x in skills ):
-        if k and (k in text or k in tagset):
+    With pyahocorasick installed the texts are scanned once for all skills;
+    otherwise one substring search per skill.
+    """
+    keys = {k for k in map(_canon, skills) if k}
+    if not keys:
+        return lambda texts, tags=(): False
+    if ahocorasick is None:
+        # for a handful of skills, `in` per key beats one big alternation
+        search = lambda hay: any(k in hay for k in keys)
+    else:
+        auto = ahocorasick.Automaton()
+        for k in keys:
+            auto.add_word(k, k)
+        auto.make_automaton()
+        search = lambda hay: next(auto.iter(hay), None) is not None
+
+    def match(texts: Iterable[str], tags: Iterable[str] = ()) -> bool:
+        if any(t and str(t).lower() in keys for t in tags):
             return True
-    return False
+        return search(" ".join([t for t in texts if t]).lower())
+    return match
+
+def _first(seen: Set[tuple], title: str, company: str, location: str) -> bool:
+    """True the first time a source sees this job (dedupe() key, minus the
+    source, which is the same for everything one source returns)."""
+    key = (title.lower(), company.lower(), location.lower())
+    if key in seen:
+        return False
+    seen.add(key)
+    return True
+
+def _get(url: str, params: Dict[str, Any] | None = None) -> requests.Response:
+    return SESSION.get(url, timeout=TIMEOUT, params=params)
 
-def remoteok(skills: List[str]) -> List[Dict[str, Any]]:
+def _get_json(url: str, params: Dict[str, Any] | None = None) -> Any:
+    """Decoded JSON body of a feed, from _feeds while fresh (see FEED_CACHE_TTL).
+    Callers share the returned object and must not modify it."""
+    key = (url, tuple(sorted((params or {}).items())))
+    with _feeds_lock:
+        hit = _feeds.get(key)
+    now = time.monotonic()
+    if hit is not None and now - hit[0] < FEED_CACHE_TTL:
+        return hit[3]
+    headers = {}
+    if hit is not None:
+        if hit[1]: headers["If-None-Match"] = hit[1]
+        if hit[2]: headers["If-Modified-Since"] = hit[2]
+    r = SESSION.get(url, timeout=TIMEOUT, params=params, headers=headers)
+    if r.status_code == 304 and hit is not None:
+        etag, modified, data = hit[1], hit[2], hit[3]
+    else:
+        r.raise_for_status()
+        etag, modified, data = r.headers.get("ETag"), r.headers.get("Last-Modified"), orjson.loads(r.content)
+    with _feeds_lock:
+        _feeds[key] = (now, etag, modified, data)
+    return data
+
+def _get_pages(url: str, params: List[Dict[str, Any]], get: Callable[..., Any] = _get) -> Iterable[Any]:
+    """get(url, p) for each params dict p, all in flight at once; results are
+    yielded in order, and a failed request raises when its turn comes."""
+    if len(params) == 1:
+        return [get(url, params[0])]
+    ex = ThreadPoolExecutor(max_workers=len(params), thread_name_prefix="scrape-page")
+    try:
+        return ex.map(lambda p: get(url, p), params)
+    finally:
+        ex.shutdown(wait=False)
+
+def remoteok(skills: List[str], match: Matcher | None = None) -> List[Dict[str, Any]]:
     url = "https://remoteok.com/api"
-    out = []
+    out, seen = [], set()
+    match = match or build_matcher(skills)
     try:
-        r = requests.get(url, headers=HEADERS, timeout=TIMEOUT)
-        r.raise_for_status()
-        data = r.json()
+        data = _get_json(url)
         for it in data[1:]:
             title = _norm(it.get("position") or it.get("title"))
             company = _norm(it.get("company"))
@@ -47,7 +151,7 @@ def remoteok(skills: List[str]) -> List[Dict[str, Any]]:
             url_i = _norm(it.get("url") or it.get("apply_url"))
             tags = it.get("tags") or []
             desc = _norm(it.get("description") or "")
-            if title and company and url_i and _match(skills, [title, company, location, desc], tags):
+            if title and company and url_i and match([title, company, location, desc], tags) and _first(seen, title, company, location):
                 # keep longer portion of the description so the UI can show more
                 snippet = desc[:4000]
                 out.append({"title": title, "company": company, "location": location, "url": url_i, "source": "RemoteOK", "tags": tags, "snippet": snippet})
@@ -56,13 +160,12 @@ def remoteok(skills: List[str]) -> List[Dict[str, Any]]:
     LOG.info("RemoteOK jobs: %d", len(out))
     return out
 
-def remotive(skills: List[str]) -> List[Dict[str, Any]]:
+def remotive(skills: List[str], match: Matcher | None = None) -> List[Dict[str, Any]]:
     url = "https://remotive.com/api/remote-jobs"
-    out = []
+    out, seen = [], set()
+    match = match or build_matcher(skills)
     try:
-        r = requests.get(url, headers=HEADERS, timeout=TIMEOUT)
-        r.raise_for_status()
-        data = r.json()
+        data = _get_json(url)
         for it in data.get("jobs", []):
             title = _norm(it.get("title"))
             company = _norm(it.get("company_name"))
@@ -70,7 +173,7 @@ def remotive(skills: List[str]) -> List[Dict[str, Any]]:
             url_i = _norm(it.get("url"))
             tags = list(filter(None, [it.get("job_type"), it.get("category")] + (it.get("tags") or [])))
             desc = _norm(it.get("description") or it.get("job_description") or "")
-            if title and company and url_i and _match(skills, [title, company, location, desc], tags):
+            if title and company and url_i and match([title, company, location, desc], tags) and _first(seen, title, company, location):
                 snippet = desc[:4000]
                 out.append({"title": title, "company": company, "location": location, "url": url_i, "source": "Remotive", "tags": tags, "snippet": snippet})
     except Exception as e:
@@ -78,14 +181,12 @@ def remotive(skills: List[str]) -> List[Dict[str, Any]]:
     LOG.info("Remotive jobs: %d", len(out))
     return out
 
-def arbeitnow(skills: List[str], pages: int = 2) -> List[Dict[str, Any]]:
+def arbeitnow(skills: List[str], pages: int = 2, match: Matcher | None = None) -> List[Dict[str, Any]]:
     base = "https://api.arbeitnow.com/api/job-board-api"
-    out = []
+    out, seen = [], set()
+    match = match or build_matcher(skills)
     try:
-        for p in range(1, pages + 1):
-            r = requests.get(base, headers=HEADERS, timeout=TIMEOUT, params={"page": p})
-            r.raise_for_status()
-            data = r.json()
+        for data in _get_pages(base, [{"page": p} for p in range(1, pages + 1)], _get_json):
             for it in data.get("data", []):
                 title = _norm(it.get("title"))
                 company = _norm(it.get("company_name") or it.get("company"))
@@ -93,48 +194,77 @@ def arbeitnow(skills: List[str], pages: int = 2) -> List[Dict[str, Any]]:
                 url_i = _norm(it.get("url"))
                 tags = it.get("tags") or []
                 desc = _norm(it.get("description") or "")
-                if title and company and url_i and _match(skills, [title, company, location, desc], tags):
+                if title and company and url_i and match([title, company, location, desc], tags) and _first(seen, title, company, location):
                     snippet = desc[:4000]
                     out.append({"title": title, "company": company, "location": location, "url": url_i, "source": "Arbeitnow", "tags": tags, "snippet": snippet})
-            time.sleep(0.7)
     except Exception as e:
         LOG.warning("Arbeitnow error: %s", e)
     LOG.info("Arbeitnow jobs: %d", len(out))
     return out
 
-def weworkremotely(skills: List[str], max_pages: int = 1) -> List[Dict[str, Any]]:
+_WWR_SPANS = ("title", "company", "region")
+# Compiled once; soup.select() would look the selector up in soupsieve's cache
+# on every page
+_WWR_ROWS = soupsieve.compile("section.jobs ul li")
+
+def _wwr_parts(li) -> tuple:
+    """Everything weworkremotely() reads from one listing, in a single walk:
+    the first <a href>, the first span.title/.company/.region, the .tag texts
+    and the joined .tooltip/.featured texts (both in document order)."""
+    a, spans, tags, teaser = None, {}, [], []
+    for el in li.find_all(True):
+        cls = el.get("class") or ()
+        if a is None and el.name == "a" and el.get("href") is not None:
+            a = el
+        if el.name == "span":
+            for c in _WWR_SPANS:
+                if c in cls and c not in spans:
+                    spans[c] = el
+        if "tag" in cls:
+            t = el.text.strip()
+            if t: tags.append(t)
+        if "tooltip" in cls or "featured" in cls:
+            t = el.text.strip()
+            if t: teaser.append(t)
+    return a, spans, tags, " ".join(teaser)
+
+def _wwr_listings(content: bytes) -> List[tuple]:
+    """(href, title, company, location, tags, teaser) for each job on a WWR
+    results page."""
+    rows = []
+    soup = BeautifulSoup(content, HTML_PARSER)
+    for li in _WWR_ROWS.select(soup):
+        a, spans, tags, teaser = _wwr_parts(li)
+        if not a: continue
+        href = a["href"]
+        # skip promo / view-all blocks
+        if "/remote-jobs/" not in href: continue
+        title_el, company_el, region_el = spans.get("title"), spans.get("company"), spans.get("region")
+        title = _norm(title_el.text if title_el else a.get("title",""))
+        company = _norm(company_el.text if company_el else "")
+        location = _norm(region_el.text if region_el else "Remote")
+        rows.append((href, title, company, location, tags, teaser))
+    return rows
+
+def weworkremotely(skills: List[str], max_pages: int = 1, match: Matcher | None = None) -> List[Dict[str, Any]]:
     # HTML scraping — check robots/ToS first.
-    query = "+".join([_canon(s).replace(" ", "+") for s in skills if s.strip()])
+    # Space-separated: requests encodes the spaces as "+" (a literal "+", as in
+    # "c++", is sent as %2B)
+    query = " ".join(dict.fromkeys(k for k in map(_canon, skills) if k.strip()))
     if not query:
         return []
     base = "https://weworkremotely.com/remote-jobs/search"
-    out = []
+    out, seen = [], set()
+    match = match or build_matcher(skills)
     try:
-        for page in range(1, max_pages+1):
-            params = {"term": query}
-            if page > 1: params["page"] = page
-            r = requests.get(base, headers=HEADERS, timeout=TIMEOUT, params=params)
+        pages = [{"term": query, **({"page": p} if p > 1 else {})} for p in range(1, max_pages + 1)]
+        for r in _get_pages(base, pages):
             r.raise_for_status()
-            soup = BeautifulSoup(r.text, "html.parser")
-            for li in soup.select("section.jobs ul li"):
-                a = li.find("a", href=True)
-                if not a: continue
-                href = a["href"]
-                # skip promo / view-all blocks
-                if "/remote-jobs/" not in href: continue
-                title_el = li.find("span", {"class": "title"})
-                company_el = li.find("span", {"class": "company"})
-                region_el = li.find("span", {"class": "region"})
-                title = _norm(title_el.text if title_el else a.get("title",""))
-                company = _norm(company_el.text if company_el else "")
-                location = _norm(region_el.text if region_el else "Remote")
+            for href, title, company, location, tags, teaser in run_native(_wwr_listings, r.content):
                 url_i = "https://weworkremotely.com" + href
-                tags = [t.text.strip() for t in li.select(".tag, .tags .tag") if t.text.strip()]
-                teaser = " ".join(t.text.strip() for t in li.select(".tooltip, .featured") if t.text.strip())
-                if title and company and _match(skills, [title, company, location, teaser], tags):
+                if title and company and match([title, company, location, teaser], tags) and _first(seen, title, company, location):
                     snippet = teaser[:4000]
                     out.append({"title": title, "company": company, "location": location, "url": url_i, "source": "WeWorkRemotely", "tags": tags, "snippet": snippet})
-            time.sleep(1.0)
     except Exception as e:
         LOG.warning("WWR error: %s", e)
     LOG.info("WWR jobs: %d", len(out))
@@ -148,12 +278,53 @@ def dedupe(jobs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
             seen.add(key); out.append(j)
     return out
 
-def all_sources(skills: List[str]) -> List[Dict[str, Any]]:
+def _spawn(fn: Callable[[], Any]) -> Future:
+    """Run fn on its own daemon thread (a greenlet under gevent's
+    monkey-patching). Not a shared pool: a source that overruns its deadline
+    keeps only its own thread busy, so it can't queue up later callers."""
+    fut: Future = Future()
+    def run():
+        if not fut.set_running_or_notify_cancel():
+            return
+        try:
+            fut.set_result(fn())
+        except BaseException as e:
+            fut.set_exception(e)
+    threading.Thread(target=run, name="scrape", daemon=True).start()
+    return fut
+
+def fetch_concurrently(calls: Dict[str, Any], deadline: float = SOURCE_DEADLINE) -> Dict[str, List[Dict[str, Any]]]:
+    """Run {name: zero-arg callable} in parallel; returns {name: jobs} for those
+    done in time. Names missing from the result timed out or raised."""
+    futures = {name: _spawn(fn) for name, fn in calls.items()}
+    wait(futures.values(), timeout=deadline)
+    out: Dict[str, List[Dict[str, Any]]] = {}
+    for name, fut in futures.items():
+        if not fut.done():
+            LOG.warning("%s timed out after %.1fs", name, deadline)
+            continue
+        try:
+            out[name] = fut.result()
+        except Exception as e:
+            LOG.warning("%s error: %s", name, e)
+    return out
+
+def all_sources(skills: List[str]) -> Tuple[List[Dict[str, Any]], bool]:
+    """(jobs from every source, partial): partial is True when a source timed
+    out or failed, so its jobs are missing rather than absent upstream."""
+    match = build_matcher(skills)
+    calls = {
+        "remoteok": lambda: remoteok(skills, match),
+        "remotive": lambda: remotive(skills, match),
+        "arbeitnow": lambda: arbeitnow(skills, pages=2, match=match),
+        "weworkremotely": lambda: weworkremotely(skills, max_pages=1, match=match),
+    }
+    results = fetch_concurrently(calls)
+    # Each source already drops its own duplicates, and dedupe() keys on the
+    # source too, so the combined list needs no further pass
     jobs = []
-    jobs.extend(remoteok(skills))
-    jobs.extend(remotive(skills))
-    jobs.extend(arbeitnow(skills, pages=2))
-    jobs.extend(weworkremotely(skills, max_pages=1))
-    jobs = dedupe(jobs)
-    LOG.info("TOTAL jobs: %d", len(jobs))
-    return jobs
+    for name in ("remoteok", "remotive", "arbeitnow", "weworkremotely"):
+        jobs.extend(results.get(name, []))
+    partial = len(results) < len(calls)
+    LOG.info("TOTAL jobs: %d%s", len(jobs), " (partial)" if partial else "")
+    return jobs, partial
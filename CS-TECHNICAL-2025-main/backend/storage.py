@@ -1,10 +1,176 @@
-import uuid
+import os, secrets, threading, time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import orjson
+
+import cache
 
 DB = {
-    "files": {},     # resume_id -> bytes
-    "resumes": {},   # resume_id -> parsed dict
+    "files": {},     # resume_id -> encrypted file metadata
+    "resumes": OrderedDict(),  # resume_id -> parsed dict (hot LRU, see get_resume)
     "sessions": {},  # session_id -> state dict
+    "faces": {},     # session_id -> face-metrics state (see get_face)
+    "jobs": {},      # job_id -> background LLM job (see jobs.py)
+    "job_keys": {},  # dedupe key -> in-flight job_id
+    "uploads": {},   # upload:<owner>:<sha256> -> resume_id (see find_upload)
 }
 
+# With REDIS_URL set, resumes, file metadata and interview sessions live in
+# Redis so every worker sees them; DB keeps a worker-local copy. Without
+# Redis the dicts are the store, as before, and ./uploads/<id>.json is the
+# durable fallback for resumes.
+RESUME_TTL = int(os.getenv("RESUME_TTL", str(30 * 24 * 3600)))
+SESSION_TTL = int(os.getenv("SESSION_TTL", str(6 * 3600)))
+RESUME_MEM_MAX = 256
+
 def new_id() -> str:
-    return str(uuid.uuid4())
+    # Same shape as upload's resume ids: 128 random bits, unguessable (session
+    # and job ids are bearer-like), without uuid4's object and hyphen formatting
+    return secrets.token_hex(16)
+
+def _resume_key(rid: str) -> str:
+    return f"resume:{rid}"
+
+def _file_key(rid: str) -> str:
+    return f"resume:{rid}:file"
+
+def _session_key(sid: str) -> str:
+    return f"session:{sid}"
+
+def _remember_resume(rid: str, payload: Dict[str, Any]) -> None:
+    resumes = DB["resumes"]
+    resumes[rid] = payload
+    resumes.move_to_end(rid)
+    while len(resumes) > RESUME_MEM_MAX:
+        resumes.popitem(last=False)
+
+def get_resume(rid: str) -> Optional[Dict[str, Any]]:
+    """Resume payload from the local LRU, Redis, then ./uploads/<rid>.json."""
+    if not rid:
+        return None
+    payload = DB["resumes"].get(rid)
+    if payload is not None:
+        DB["resumes"].move_to_end(rid)
+        return payload
+    payload = cache.get_json(_resume_key(rid))
+    if payload is None:
+        json_path = f"./uploads/{rid}.json"
+        if not os.path.exists(json_path):
+            return None
+        try:
+            with open(json_path, "rb") as jf:
+                payload = orjson.loads(jf.read())
+        except Exception as e:
+            print(f"[storage] could not load {json_path}: {e}")
+            return None
+        cache.set_json(_resume_key(rid), payload, ttl=RESUME_TTL)
+    _remember_resume(rid, payload)
+    return payload
+
+def get_resume_bytes(rid: str) -> Optional[bytes]:
+    """Serialized resume payload, straight from Redis when it holds it."""
+    if not rid:
+        return None
+    raw = cache.get_bytes(_resume_key(rid))
+    if raw is not None:
+        return raw
+    payload = get_resume(rid)
+    return None if payload is None else orjson.dumps(payload)
+
+def put_resume(rid: str, payload: Dict[str, Any], file_meta: Optional[Dict[str, Any]] = None) -> None:
+    _remember_resume(rid, payload)
+    cache.set_json(_resume_key(rid), payload, ttl=RESUME_TTL)
+    if file_meta is not None:
+        DB["files"][rid] = file_meta
+        cache.set_json(_file_key(rid), file_meta, ttl=RESUME_TTL)
+
+def drop_resume(rid: str) -> Optional[Dict[str, Any]]:
+    """Forget a resume everywhere; returns its file metadata if known."""
+    DB["resumes"].pop(rid, None)
+    file_meta = DB["files"].pop(rid, None) or cache.get_json(_file_key(rid))
+    cache.delete(_resume_key(rid), _file_key(rid))
+    return file_meta
+
+def _upload_key(owner: str, digest: str) -> str:
+    return f"upload:{owner}:{digest}"
+
+def find_upload(owner: str, digest: str) -> Optional[str]:
+    """resume_id of an identical file this user already uploaded, if it still exists."""
+    key = _upload_key(owner, digest)
+    rid = DB["uploads"].get(key) or cache.get_json(key)
+    if rid and get_resume(rid) is not None:
+        return rid
+    return None
+
+def remember_upload(owner: str, digest: str, rid: str) -> None:
+    key = _upload_key(owner, digest)
+    DB["uploads"][key] = rid
+    cache.set_json(key, rid, ttl=RESUME_TTL)
+
+def forget_upload(owner: str, digest: str) -> None:
+    key = _upload_key(owner, digest)
+    DB["uploads"].pop(key, None)
+    cache.delete(key)
+
+def get_session(sid: str) -> Optional[Dict[str, Any]]:
+    """Interview session state; Redis wins so any worker sees the latest copy."""
+    if not sid:
+        return None
+    sess = cache.get_json(_session_key(sid))
+    if sess is not None:
+        DB["sessions"][sid] = sess
+        return sess
+    return DB["sessions"].get(sid)
+
+def put_session(sid: str, sess: Dict[str, Any]) -> None:
+    """Save session state after a handler has mutated it."""
+    DB["sessions"][sid] = sess
+    cache.set_json(_session_key(sid), sess, ttl=SESSION_TTL)
+
+# Socket.IO runs every event in its own greenlet, and each handler does a
+# read-modify-write of the session (or its face state) around Redis calls
+# that yield. Handlers hold this lock for the whole read-modify-write so one
+# event can't overwrite another's update with a stale copy. A session's
+# socket events all reach the worker that holds its connection, so a
+# worker-local lock is enough. One lock per session ever seen, like
+# DB["sessions"].
+_session_locks: Dict[str, threading.Lock] = {}
+_session_locks_guard = threading.Lock()
+
+def session_lock(sid: str) -> threading.Lock:
+    with _session_locks_guard:
+        lock = _session_locks.get(sid)
+        if lock is None:
+            lock = _session_locks[sid] = threading.Lock()
+        return lock
+
+# Face metrics arrive at up to 30 messages/s and change only their own state,
+# so it lives under its own key, away from the session's questions and
+# answers. The worker-local copy is the live one (the socket's events all
+# land here); Redis gets it at most every FACE_SAVE_SECS, and on demand.
+FACE_SAVE_SECS = 1.0
+_face_saved: Dict[str, float] = {}
+
+def _face_key(sid: str) -> str:
+    return f"session:{sid}:face"
+
+def get_face(sid: str) -> Optional[Dict[str, Any]]:
+    """Face-metrics state of a session: the local copy, else Redis."""
+    if not sid:
+        return None
+    st = DB["faces"].get(sid)
+    if st is None:
+        st = cache.get_json(_face_key(sid))
+        if st is not None:
+            DB["faces"][sid] = st
+    return st
+
+def put_face(sid: str, st: Dict[str, Any], force: bool = False) -> None:
+    """Keep face state; written through to Redis when `force` or at most
+    every FACE_SAVE_SECS."""
+    DB["faces"][sid] = st
+    now = time.monotonic()
+    if force or now - _face_saved.get(sid, float("-inf")) >= FACE_SAVE_SECS:
+        _face_saved[sid] = now
+        cache.set_json(_face_key(sid), st, ttl=SESSION_TTL)
@@ -142,6 +142,24 @@ class InterviewSocketClient {
     });
   }
 
+  /**
+   * Send several face-metric frames in one message (e.g. buffer ~15 frames and flush at 2 Hz)
+   */
+  sendFaceMetricsBatch(frames: Array<{
+    attention: number;
+    smiling: boolean;
+    faces: number;
+  }>) {
+    if (!this.socket?.connected || !this.sessionId) {
+      throw new Error('Not in an active interview session');
+    }
+    if (!frames.length) return;
+    this.socket.emit('face_metrics', {
+      session_id: this.sessionId,
+      frames,
+    });
+  }
+
   // ==========================================
   // Event Listeners
   // ==========================================